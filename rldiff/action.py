@@ -1,6 +1,7 @@
 import numpy as np
 
 from dataclasses import dataclass
+from numpy.typing import DTypeLike
 
 
 @dataclass
@@ -17,7 +18,10 @@ class Action:
 
     @property
     def vector(self) -> np.ndarray:
-        return np.array([self.charge_battery, self.charge_hydrogen], dtype=np.float64)
+        return self.to_vector()
+
+    def to_vector(self, dtype: DTypeLike = np.float64) -> np.ndarray:
+        return np.array([self.charge_battery, self.charge_hydrogen], dtype=dtype)
 
     @classmethod
     def from_vector(cls, action: np.ndarray) -> "Action":
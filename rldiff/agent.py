@@ -0,0 +1,99 @@
+import numpy as np
+import gymnasium as gym
+
+from typing import Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class Agent(Protocol):
+    """Policy interface shared by every agent acting on a RyeEnv.
+
+    Agents work on batches so they can drive vectorized or parallel rollouts
+    without a Python call per environment.
+    """
+
+    def act(self, observations: np.ndarray) -> np.ndarray:
+        """Map a batch of observations to a batch of actions.
+
+        Args:
+            observations: (N, 8) array of state vectors
+
+        Returns:
+            actions: (N, 2) array of [charge_battery, charge_hydrogen]
+        """
+        ...
+
+
+class RandomActionAgent:
+    """Agent drawing uniform actions from the action space.
+
+    Actions are drawn from the agent's own Generator a whole buffer at a time,
+    so consecutive act() calls are served from a pre-generated stream.
+
+    Attributes:
+        _action_space
+        _rng
+        _stream_length
+        _stream
+        _position
+    """
+
+    _action_space: gym.spaces.Box
+    _rng: np.random.Generator
+    _stream_length: int
+    _stream: np.ndarray
+    _position: int
+
+    def __init__(
+        self,
+        action_space: gym.spaces.Box,
+        random_seed: Optional[int] = None,
+        stream_length: int = 24 * 30,
+    ) -> None:
+        """Initializing the random agent.
+
+        Args:
+            action_space
+            random_seed
+            stream_length: number of actions pre-generated per draw
+        """
+        self._action_space = action_space
+        self._rng = np.random.default_rng(random_seed)
+        self._stream_length = stream_length
+        self._stream = np.empty((0, 2), dtype=action_space.dtype)
+        self._position = 0
+
+    def sample_episodes(self, episode_length: int, n_episodes: int = 1) -> np.ndarray:
+        """Draw whole episodes of actions in one call.
+
+        Args:
+            episode_length: number of steps per episode
+            n_episodes
+
+        Returns:
+            actions: (n_episodes, episode_length, 2) array
+        """
+        return self._rng.uniform(
+            low=self._action_space.low,
+            high=self._action_space.high,
+            size=(n_episodes, episode_length, 2),
+        ).astype(self._action_space.dtype, copy=False)
+
+    def _next_actions(self, n: int) -> np.ndarray:
+        """Return the next n actions, refilling the stream when exhausted."""
+        if self._position + n > len(self._stream):
+            self._stream = self.sample_episodes(max(self._stream_length, n))[0]
+            self._position = 0
+
+        actions = self._stream[self._position : self._position + n]
+        self._position += n
+
+        return actions
+
+    def act(self, observations: np.ndarray) -> np.ndarray:
+        """Return one action per observation from the action stream."""
+        return self._next_actions(len(observations))
+
+    def get_action(self, state: Optional[np.ndarray] = None) -> np.ndarray:
+        """Pull any action from action space"""
+        return self._next_actions(1)[0]
@@ -0,0 +1,543 @@
+from __future__ import annotations
+
+import json
+import numpy as np
+
+from os import makedirs
+from rldiff.env import RyeEnv
+from rldiff.agent import Agent
+from os.path import basename, getsize, join
+from numpy.typing import DTypeLike
+from datetime import datetime, timedelta
+from rldiff.preprocessing import PreprocessedData
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from typing import Sequence, Tuple
+
+# pyarrow is only needed when shards are written or read
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+# Builds the behavior policy for one episode from that episode's seed
+PolicyFactory = Callable[[int], Agent]
+
+FORMATS = ("parquet", "arrow")
+MANIFEST = "manifest.json"
+
+OBSERVATION_SIZE = 8
+ACTION_SIZE = 2
+
+
+class ShardWriter:
+    """Streams transitions into size-bounded Parquet or Arrow IPC shards.
+
+    Rows are buffered in preallocated arrays and written as one row group or
+    record batch every `chunk_rows` rows. A new shard is started once the
+    uncompressed size of the current one would exceed `shard_bytes`.
+
+    Attributes:
+        _directory
+        _prefix
+        _format
+        _dtype
+        _shard_bytes
+        _chunk_rows
+        _buffer
+        _rows
+        _writer
+        _shard_path
+        _shard_rows
+        _shard_size
+        _shard_episodes
+        shards
+    """
+
+    _directory: str
+    _prefix: str
+    _format: str
+    _dtype: np.dtype
+    _shard_bytes: int
+    _chunk_rows: int
+    _buffer: Dict[str, np.ndarray]
+    _rows: int
+    _writer: Any
+    _shard_path: Optional[str]
+    _shard_rows: int
+    _shard_size: int
+    _shard_episodes: Tuple[int, int]
+
+    shards: List[Dict[str, Any]]
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str,
+        format: str = "parquet",
+        dtype: DTypeLike = np.float32,
+        shard_bytes: int = 64 * 2**20,
+        chunk_rows: int = 8192,
+    ) -> None:
+        """Initializing the shard writer.
+
+        Args:
+            directory: output directory
+            prefix: shard file name prefix, unique per writer
+            format: one of FORMATS
+            dtype: floating point type of observations, actions and rewards
+            shard_bytes: upper bound on the uncompressed size of one shard
+            chunk_rows: rows per row group / record batch
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Format {format} is not available.")
+
+        self._directory = directory
+        self._prefix = prefix
+        self._format = format
+        self._dtype = np.dtype(dtype)
+        self._shard_bytes = shard_bytes
+        self._chunk_rows = chunk_rows
+
+        self._buffer = {
+            "observation": np.empty((chunk_rows, OBSERVATION_SIZE), self._dtype),
+            "action": np.empty((chunk_rows, ACTION_SIZE), self._dtype),
+            "reward": np.empty(chunk_rows, self._dtype),
+            "terminal": np.empty(chunk_rows, np.bool_),
+            "episode_id": np.empty(chunk_rows, np.int64),
+            "policy_id": np.empty(chunk_rows, np.int16),
+        }
+        self._rows = 0
+
+        self._writer = None
+        self._shard_path = None
+        self._shard_rows = 0
+        self._shard_size = 0
+        self._shard_episodes = (0, 0)
+
+        self.shards = []
+
+    def append(
+        self,
+        observations: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        terminals: np.ndarray,
+        episode_id: int,
+        policy_id: int,
+    ) -> None:
+        """
+        Append the transitions of one episode.
+
+        Args:
+            observations: (H, 8) observations before each action
+            actions: (H, 2)
+            rewards: (H,)
+            terminals: (H,)
+            episode_id
+            policy_id
+        """
+        start = 0
+        length = len(rewards)
+
+        while start < length:
+            n = min(length - start, self._chunk_rows - self._rows)
+            rows = slice(self._rows, self._rows + n)
+            source = slice(start, start + n)
+
+            self._buffer["observation"][rows] = observations[source]
+            self._buffer["action"][rows] = actions[source]
+            self._buffer["reward"][rows] = rewards[source]
+            self._buffer["terminal"][rows] = terminals[source]
+            self._buffer["episode_id"][rows] = episode_id
+            self._buffer["policy_id"][rows] = policy_id
+
+            self._rows += n
+            start += n
+
+            if self._rows == self._chunk_rows:
+                self._flush()
+
+    def _record_batch(self) -> pa.RecordBatch:
+        """Returns the buffered rows as a record batch."""
+        import pyarrow as pa
+
+        rows = slice(0, self._rows)
+        columns = {}
+
+        for name, values in self._buffer.items():
+            if values.ndim == 2:
+                columns[name] = pa.FixedSizeListArray.from_arrays(
+                    pa.array(values[rows].ravel()), values.shape[1]
+                )
+            else:
+                columns[name] = pa.array(values[rows])
+
+        return pa.RecordBatch.from_pydict(columns)
+
+    def _flush(self) -> None:
+        """Write buffered rows to the current shard."""
+        if self._rows == 0:
+            return
+
+        batch = self._record_batch()
+
+        if self._writer is not None and (
+            self._shard_size + batch.nbytes > self._shard_bytes
+        ):
+            self._close_shard()
+
+        episode_ids = self._buffer["episode_id"]
+
+        if self._writer is None:
+            self._open_shard(batch.schema)
+            self._shard_episodes = (int(episode_ids[0]), 0)
+
+        self._writer.write_batch(batch)
+
+        self._shard_episodes = (
+            self._shard_episodes[0],
+            int(episode_ids[self._rows - 1]),
+        )
+        self._shard_rows += self._rows
+        self._shard_size += batch.nbytes
+        self._rows = 0
+
+    def _open_shard(self, schema: pa.Schema) -> None:
+        import pyarrow as pa
+
+        name = f"{self._prefix}-{len(self.shards):05d}.{self._format}"
+        self._shard_path = join(self._directory, name)
+
+        if self._format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._shard_path, schema)
+        else:
+            self._writer = pa.ipc.new_file(self._shard_path, schema)
+
+        self._shard_rows = 0
+        self._shard_size = 0
+
+    def _close_shard(self) -> None:
+        self._writer.close()
+
+        self.shards.append(
+            {
+                "path": basename(self._shard_path),
+                "rows": self._shard_rows,
+                "bytes": getsize(self._shard_path),
+                "chunks": _count_chunks(self._shard_path, self._format),
+                "first_episode": self._shard_episodes[0],
+                "last_episode": self._shard_episodes[1],
+            }
+        )
+
+        self._writer = None
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush remaining rows, close the open shard and return all shards."""
+        self._flush()
+
+        if self._writer is not None:
+            self._close_shard()
+
+        return self.shards
+
+
+def _rollout(
+    env: RyeEnv, agent: Agent, start_time: datetime, steps: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Run one episode and return observations, actions, rewards and terminals."""
+    observations = np.empty((steps, OBSERVATION_SIZE), env.observation_space.dtype)
+    actions = np.empty((steps, ACTION_SIZE), env.action_space.dtype)
+    rewards = np.empty(steps, env.observation_space.dtype)
+    terminals = np.zeros(steps, np.bool_)
+
+    observation = env.reset(start_time=start_time)
+
+    for step in range(steps):
+        observations[step] = observation
+        actions[step] = agent.act(observation[None])[0]
+
+        observation, rewards[step], terminals[step], _ = env.step(actions[step])
+
+    return observations, actions, rewards, terminals
+
+
+def _generate_worker(
+    worker: int,
+    data: PreprocessedData,
+    policies: Sequence[PolicyFactory],
+    tasks: Sequence[Tuple[int, int, datetime]],
+    directory: str,
+    episode_length: timedelta,
+    random_seed: int,
+    writer_options: Dict[str, Any],
+    env_options: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """Roll out (episode_id, policy_id, start_time) tasks and write their shards."""
+    env = RyeEnv(data, episode_length, dtype=writer_options["dtype"], **env_options)
+    steps = int(episode_length / timedelta(hours=1))
+    writer = ShardWriter(directory, f"shard-{worker:03d}", **writer_options)
+
+    for episode_id, policy_id, start_time in tasks:
+        agent = policies[policy_id](random_seed + episode_id)
+        writer.append(
+            *_rollout(env, agent, start_time, steps),
+            episode_id=episode_id,
+            policy_id=policy_id,
+        )
+
+    return writer.close()
+
+
+def generate_dataset(
+    data: PreprocessedData,
+    policies: Dict[str, PolicyFactory],
+    start_times: Sequence[datetime],
+    directory: str,
+    episode_length: timedelta = timedelta(days=30),
+    workers: int = 1,
+    random_seed: int = 0,
+    format: str = "parquet",
+    dtype: DTypeLike = np.float32,
+    shard_bytes: int = 64 * 2**20,
+    chunk_rows: int = 8192,
+    env_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Generate an offline RL dataset from behavior policies on RyeEnv.
+
+    Every policy is rolled out from every start time. Episodes are split over
+    worker processes, each of which writes its own shards, and a manifest
+    describing all shards is written to `directory`.
+
+    Args:
+        data: preprocessed Rye data
+        policies: policy name to factory building the policy from a seed
+        start_times: episode start times
+        directory: output directory
+        episode_length
+        workers: number of worker processes, 1 runs in this process
+        random_seed: base seed, episode i uses random_seed + i
+        format: one of FORMATS
+        dtype: floating point type of the environment and stored arrays
+        shard_bytes: upper bound on the uncompressed size of one shard
+        chunk_rows: rows per row group / record batch
+        env_options: additional keyword arguments for RyeEnv
+
+    Returns:
+        manifest
+    """
+    makedirs(directory, exist_ok=True)
+
+    env_options = env_options or {}
+    names = list(policies)
+    factories = [policies[name] for name in names]
+    writer_options = {
+        "format": format,
+        "dtype": np.dtype(dtype).name,
+        "shard_bytes": shard_bytes,
+        "chunk_rows": chunk_rows,
+    }
+
+    tasks = [
+        (episode_id, policy_id, start_time)
+        for episode_id, (policy_id, start_time) in enumerate(
+            (policy_id, start_time)
+            for policy_id in range(len(names))
+            for start_time in start_times
+        )
+    ]
+    arguments = [
+        (
+            worker,
+            data,
+            factories,
+            tasks[worker::workers],
+            directory,
+            episode_length,
+            random_seed,
+            writer_options,
+            env_options,
+        )
+        for worker in range(min(workers, len(tasks)))
+    ]
+
+    if workers == 1:
+        results = [_generate_worker(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_generate_worker, *zip(*arguments)))
+
+    manifest = {
+        "format": format,
+        "dtype": writer_options["dtype"],
+        "episode_length_hours": int(episode_length / timedelta(hours=1)),
+        "policies": names,
+        "episodes": len(tasks),
+        "rows": sum(shard["rows"] for shards in results for shard in shards),
+        "random_seed": random_seed,
+        "env_options": env_options,
+        "shards": [shard for shards in results for shard in shards],
+    }
+
+    with open(join(directory, MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=2)
+
+    return manifest
+
+
+def _count_chunks(path: str, format: str) -> int:
+    """Number of row groups / record batches in a shard, from its metadata."""
+    import pyarrow as pa
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_metadata(path).num_row_groups
+
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).num_record_batches
+
+
+def _read_chunk(path: str, format: str, index: int) -> pa.Table:
+    """Read one row group / record batch, closing the shard afterwards.
+
+    Memory-mapped buffers outlive the file handle, so the returned table stays
+    valid while no descriptor is held open.
+    """
+    import pyarrow as pa
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        with pq.ParquetFile(path, memory_map=True) as file:
+            return file.read_row_group(index)
+
+    with pa.memory_map(path) as source:
+        return pa.Table.from_batches([pa.ipc.open_file(source).get_batch(index)])
+
+
+class OfflineDataset:
+    """Reader for datasets written by generate_dataset.
+
+    Shards are memory-mapped and read one row group / record batch at a time,
+    so minibatches can be drawn without loading the dataset into memory. A
+    shard is only open while one of its chunks is read.
+
+    Attributes:
+        _directory
+        manifest
+    """
+
+    _directory: str
+    manifest: Dict[str, Any]
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+        with open(join(directory, MANIFEST)) as file:
+            self.manifest = json.load(file)
+
+    def __len__(self) -> int:
+        return self.manifest["rows"]
+
+    def _chunks(self) -> List[Tuple[str, int]]:
+        """Returns (shard path, chunk index) of every chunk in the dataset.
+
+        Chunk counts come from the manifest, or from shard metadata for
+        manifests written without them. No shard stays open.
+        """
+        format = self.manifest["format"]
+        chunks = []
+
+        for shard in self.manifest["shards"]:
+            path = join(self._directory, shard["path"])
+            count = shard.get("chunks")
+
+            if count is None:
+                count = _count_chunks(path, format)
+
+            chunks.extend((path, index) for index in range(count))
+
+        return chunks
+
+    @staticmethod
+    def _to_numpy(table: pa.Table) -> Dict[str, np.ndarray]:
+        """Convert a table to arrays, zero-copy where Arrow allows it."""
+        arrays = {}
+
+        for name in table.column_names:
+            column = table.column(name).combine_chunks()
+
+            if name in ("observation", "action"):
+                size = column.type.list_size
+                arrays[name] = column.flatten().to_numpy().reshape(-1, size)
+            else:
+                arrays[name] = column.to_numpy(zero_copy_only=False)
+
+        return arrays
+
+    def iterate(
+        self,
+        batch_size: int,
+        shuffle: bool = True,
+        random_seed: Optional[int] = None,
+        buffer_rows: int = 2**16,
+        drop_last: bool = False,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield minibatches of transitions.
+
+        With shuffling, shards and chunks are visited in random order and rows
+        are drawn from a shuffle buffer holding at least `buffer_rows` rows.
+
+        Args:
+            batch_size
+            shuffle
+            random_seed
+            buffer_rows: rows held in memory for shuffling
+            drop_last: skip the final incomplete minibatch
+
+        Returns:
+            batches: dictionaries of observation, action, reward, terminal,
+                episode_id and policy_id arrays
+        """
+        rng = np.random.default_rng(random_seed)
+        format = self.manifest["format"]
+        chunks = self._chunks()
+
+        if shuffle:
+            chunks = [chunks[index] for index in rng.permutation(len(chunks))]
+
+        buffer: List[Dict[str, np.ndarray]] = []
+        buffered = 0
+
+        for position, (path, index) in enumerate(chunks):
+            buffer.append(self._to_numpy(_read_chunk(path, format, index)))
+            buffered += len(buffer[-1]["reward"])
+
+            last = position == len(chunks) - 1
+            if buffered < max(buffer_rows, batch_size) and not last:
+                continue
+
+            rows = {
+                name: np.concatenate([chunk[name] for chunk in buffer])
+                for name in buffer[0]
+            }
+            order = rng.permutation(buffered) if shuffle else np.arange(buffered)
+
+            # Keep the remainder in the buffer unless this is the last chunk
+            complete = buffered if last else buffered - buffered % batch_size
+
+            for start in range(0, complete, batch_size):
+                indices = order[start : start + batch_size]
+
+                if len(indices) < batch_size and drop_last:
+                    break
+
+                yield {name: values[indices] for name, values in rows.items()}
+
+            remainder = order[complete:]
+            buffer = [{name: values[remainder] for name, values in rows.items()}]
+            buffered = len(remainder)
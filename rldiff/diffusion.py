@@ -0,0 +1,311 @@
+import numpy as np
+
+from typing import Dict, Optional, Tuple
+
+
+class NoiseSchedule:
+    """Linear beta schedule of a denoising diffusion model.
+
+    Attributes:
+        steps
+        betas
+        alphas_cumprod
+    """
+
+    steps: int
+    betas: np.ndarray
+    alphas_cumprod: np.ndarray
+
+    def __init__(
+        self, steps: int = 1000, beta_start: float = 1e-4, beta_end: float = 2e-2
+    ) -> None:
+        self.steps = steps
+        self.betas = np.linspace(beta_start, beta_end, steps)
+        self.alphas_cumprod = np.cumprod(1.0 - self.betas)
+
+    def add_noise(self, x: np.ndarray, t: np.ndarray, noise: np.ndarray) -> np.ndarray:
+        """Sample x_t from q(x_t | x_0) for a batch of timesteps."""
+        alpha = self.alphas_cumprod[t][:, None].astype(x.dtype)
+
+        return np.sqrt(alpha) * x + np.sqrt(1.0 - alpha) * noise
+
+    def ddim_timesteps(self, steps: int) -> np.ndarray:
+        """Returns a decreasing subsequence of `steps` timesteps for DDIM."""
+        return np.unique(np.linspace(0, self.steps - 1, steps).round().astype(int))[
+            ::-1
+        ]
+
+
+def _silu(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns SiLU activation and its sigmoid, which the gradient needs."""
+    sigmoid = 0.5 * (1.0 + np.tanh(0.5 * x))
+
+    return x * sigmoid, sigmoid
+
+
+class MLPDenoiser:
+    """Noise prediction network eps(x_t, t, c) trained with numpy on CPU.
+
+    The first layer is split into input, timestep and condition parts, so the
+    condition encoding can be computed once and reused for every denoising step.
+
+    Attributes:
+        input_size
+        condition_size
+        embedding_size
+        parameters
+        _moments
+        _updates
+    """
+
+    input_size: int
+    condition_size: int
+    embedding_size: int
+    parameters: Dict[str, np.ndarray]
+    _moments: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    _updates: int
+
+    def __init__(
+        self,
+        input_size: int,
+        condition_size: int = 0,
+        hidden_size: int = 256,
+        embedding_size: int = 32,
+        random_seed: Optional[int] = None,
+        dtype: np.dtype = np.float32,
+    ) -> None:
+        """Initializing the denoiser.
+
+        Args:
+            input_size: size of the flattened sample
+            condition_size: size of the condition vector, 0 if unconditional
+            hidden_size
+            embedding_size: size of the sinusoidal timestep embedding
+            random_seed
+            dtype
+        """
+        rng = np.random.default_rng(random_seed)
+
+        def weight(rows: int, columns: int, scale: float = 1.0) -> np.ndarray:
+            std = scale / np.sqrt(max(rows, 1))
+            return rng.normal(0.0, std, (rows, columns)).astype(dtype)
+
+        self.input_size = input_size
+        self.condition_size = condition_size
+        self.embedding_size = embedding_size
+
+        self.parameters = {
+            "input": weight(input_size, hidden_size),
+            "time": weight(embedding_size, hidden_size),
+            "condition": weight(condition_size, hidden_size),
+            "bias_1": np.zeros(hidden_size, dtype),
+            "hidden": weight(hidden_size, hidden_size),
+            "bias_2": np.zeros(hidden_size, dtype),
+            "output": weight(hidden_size, input_size, scale=0.1),
+            "bias_3": np.zeros(input_size, dtype),
+        }
+        self._moments = {
+            name: (np.zeros_like(value), np.zeros_like(value))
+            for name, value in self.parameters.items()
+        }
+        self._updates = 0
+
+    def time_embedding(self, t: np.ndarray) -> np.ndarray:
+        """Sinusoidal embedding of integer timesteps."""
+        half = self.embedding_size // 2
+        frequencies = np.exp(-np.log(10000.0) * np.arange(half) / half)
+        angles = np.asarray(t, dtype=np.float64)[..., None] * frequencies
+
+        return np.concatenate([np.sin(angles), np.cos(angles)], axis=-1).astype(
+            self.parameters["time"].dtype
+        )
+
+    def encode_condition(self, condition: Optional[np.ndarray] = None) -> np.ndarray:
+        """Project the condition into the first hidden layer, including its bias.
+
+        Args:
+            condition: (B, condition_size) array, None if unconditional
+
+        Returns:
+            encoded: (B, hidden_size) or (hidden_size,) first layer offset
+        """
+        if condition is None:
+            return self.parameters["bias_1"]
+
+        return condition @ self.parameters["condition"] + self.parameters["bias_1"]
+
+    def _forward(
+        self, x: np.ndarray, t: np.ndarray, encoded: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        p = self.parameters
+        embedding = self.time_embedding(t)
+
+        pre_1 = x @ p["input"] + embedding @ p["time"] + encoded
+        hidden_1, sigmoid_1 = _silu(pre_1)
+        pre_2 = hidden_1 @ p["hidden"] + p["bias_2"]
+        hidden_2, sigmoid_2 = _silu(pre_2)
+        output = hidden_2 @ p["output"] + p["bias_3"]
+
+        cache = {
+            "x": x,
+            "embedding": embedding,
+            "pre_1": pre_1,
+            "sigmoid_1": sigmoid_1,
+            "hidden_1": hidden_1,
+            "pre_2": pre_2,
+            "sigmoid_2": sigmoid_2,
+            "hidden_2": hidden_2,
+        }
+
+        return output, cache
+
+    def predict(
+        self, x: np.ndarray, t: np.ndarray, encoded: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Predict the noise in x_t.
+
+        Args:
+            x: (B, input_size) noisy samples
+            t: scalar or (B,) timesteps
+            encoded: output of encode_condition, reused across steps
+
+        Returns:
+            noise: (B, input_size)
+        """
+        if encoded is None:
+            encoded = self.encode_condition()
+
+        return self._forward(x, t, encoded)[0]
+
+    def train_step(
+        self,
+        x: np.ndarray,
+        schedule: NoiseSchedule,
+        rng: np.random.Generator,
+        condition: Optional[np.ndarray] = None,
+        learning_rate: float = 1e-3,
+    ) -> float:
+        """Take one Adam step on the noise prediction loss of a batch.
+
+        Args:
+            x: (B, input_size) clean samples
+            schedule
+            rng
+            condition: (B, condition_size), None if unconditional
+            learning_rate
+
+        Returns:
+            loss: mean squared error of the predicted noise
+        """
+        p = self.parameters
+        batch = len(x)
+
+        t = rng.integers(0, schedule.steps, batch)
+        noise = rng.standard_normal(x.shape).astype(x.dtype)
+        noisy = schedule.add_noise(x, t, noise)
+
+        output, cache = self._forward(noisy, t, self.encode_condition(condition))
+        error = output - noise
+        loss = float(np.mean(error**2))
+
+        # Backpropagation
+        grad_output = 2.0 * error / error.size
+        grad_hidden_2 = grad_output @ p["output"].T
+        grad_pre_2 = grad_hidden_2 * (
+            cache["sigmoid_2"]
+            + cache["pre_2"] * cache["sigmoid_2"] * (1.0 - cache["sigmoid_2"])
+        )
+        grad_hidden_1 = grad_pre_2 @ p["hidden"].T
+        grad_pre_1 = grad_hidden_1 * (
+            cache["sigmoid_1"]
+            + cache["pre_1"] * cache["sigmoid_1"] * (1.0 - cache["sigmoid_1"])
+        )
+
+        gradients = {
+            "output": cache["hidden_2"].T @ grad_output,
+            "bias_3": grad_output.sum(axis=0),
+            "hidden": cache["hidden_1"].T @ grad_pre_2,
+            "bias_2": grad_pre_2.sum(axis=0),
+            "input": cache["x"].T @ grad_pre_1,
+            "time": cache["embedding"].T @ grad_pre_1,
+            "bias_1": grad_pre_1.sum(axis=0),
+        }
+        if condition is not None:
+            gradients["condition"] = condition.T @ grad_pre_1
+
+        self._adam(gradients, learning_rate)
+
+        return loss
+
+    def _adam(
+        self,
+        gradients: Dict[str, np.ndarray],
+        learning_rate: float,
+        beta_1: float = 0.9,
+        beta_2: float = 0.999,
+        epsilon: float = 1e-8,
+    ) -> None:
+        self._updates += 1
+
+        for name, gradient in gradients.items():
+            first, second = self._moments[name]
+            first *= beta_1
+            first += (1.0 - beta_1) * gradient
+            second *= beta_2
+            second += (1.0 - beta_2) * gradient**2
+
+            first_hat = first / (1.0 - beta_1**self._updates)
+            second_hat = second / (1.0 - beta_2**self._updates)
+
+            self.parameters[name] -= (
+                learning_rate * first_hat / (np.sqrt(second_hat) + epsilon)
+            ).astype(self.parameters[name].dtype)
+
+
+def ddim_sample(
+    denoiser: MLPDenoiser,
+    schedule: NoiseSchedule,
+    noise: np.ndarray,
+    steps: int = 50,
+    encoded: Optional[np.ndarray] = None,
+    clip: Optional[float] = None,
+) -> np.ndarray:
+    """Deterministic DDIM sampling from a batch of initial noise.
+
+    Args:
+        denoiser
+        schedule
+        noise: (B, input_size) initial samples x_T
+        steps: number of denoising passes
+        encoded: condition encoding, computed once and reused for every step
+        clip: bound on the magnitude of the predicted x_0, if the data has one
+
+    Returns:
+        samples: (B, input_size) denoised x_0
+    """
+    if encoded is None:
+        encoded = denoiser.encode_condition()
+
+    timesteps = schedule.ddim_timesteps(steps)
+    x = noise
+
+    for index, t in enumerate(timesteps):
+        alpha = schedule.alphas_cumprod[t]
+        alpha_previous = (
+            schedule.alphas_cumprod[timesteps[index + 1]]
+            if index + 1 < len(timesteps)
+            else 1.0
+        )
+
+        predicted_noise = denoiser.predict(x, t, encoded)
+        x_0 = (x - np.sqrt(1.0 - alpha) * predicted_noise) / np.sqrt(alpha)
+
+        if clip is not None:
+            x_0 = np.clip(x_0, -clip, clip)
+            predicted_noise = (x - np.sqrt(alpha) * x_0) / np.sqrt(1.0 - alpha)
+        x = (
+            np.sqrt(alpha_previous) * x_0
+            + np.sqrt(1.0 - alpha_previous) * predicted_noise
+        ).astype(noise.dtype)
+
+    return x
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import numpy as np
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from rldiff.env import RyeEnv
+
+
+# Scalars are shared by every site, arrays hold one value per site
+Parameter = Union[float, np.ndarray]
+
+
+@dataclass(frozen=True)
+class MicrogridParameters:
+    """Physical limits, losses and tariffs of the Rye microgrid.
+
+    Args:
+        charge_loss_battery
+        charge_loss_hydrogen
+        grid_tarrif [NOK/kWh]
+        peak_grid_tarrif [NOK/kW]
+        battery_capacity [kWh]
+        hydrogen_capacity [kWh]
+        charge_battery_min [kW/h]
+        charge_battery_max [kW/h]
+        charge_hydrogen_min [kW/h]
+        charge_hydrogen_max [kW/h]
+    """
+
+    charge_loss_battery: Parameter = 0.85
+    charge_loss_hydrogen: Parameter = 0.325
+    grid_tarrif: Parameter = 0.05
+    peak_grid_tarrif: float = 49.0
+    battery_capacity: Parameter = 500.0
+    hydrogen_capacity: Parameter = 1670.0
+    charge_battery_min: Parameter = -400.0
+    charge_battery_max: Parameter = 400.0
+    charge_hydrogen_min: Parameter = -100.0
+    charge_hydrogen_max: Parameter = 55.0
+
+    @classmethod
+    def from_env(cls, env: RyeEnv) -> "MicrogridParameters":
+        """Returns the parameters a RyeEnv was constructed with."""
+        return cls(
+            charge_loss_battery=env._charge_loss_battery_storage,
+            charge_loss_hydrogen=env._change_loss_hydrogen_storage,
+            grid_tarrif=env._grid_tariff,
+            peak_grid_tarrif=env._peak_grid_tarrif,
+            battery_capacity=env._state_space_max.battery_storage,
+            hydrogen_capacity=env._state_space_max.hydrogen_storage,
+            charge_battery_min=env._action_space_min.charge_battery,
+            charge_battery_max=env._action_space_max.charge_battery,
+            charge_hydrogen_min=env._action_space_min.charge_hydrogen,
+            charge_hydrogen_max=env._action_space_max.charge_hydrogen,
+        )
+
+
+def transition(
+    parameters: MicrogridParameters,
+    battery_storage: np.ndarray,
+    hydrogen_storage: np.ndarray,
+    action: np.ndarray,
+    exogenous: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Array version of RyeEnv._perform_action_on_env for any batch shape.
+
+    Applies the same saturation, charge loss, storage clipping and discharge
+    rules as the scalar environment. As there, the hydrogen charge loss is
+    applied when the battery is charging.
+
+    Args:
+        parameters
+        battery_storage: (...) current battery storage
+        hydrogen_storage: (...) current hydrogen storage
+        action: (..., 2) requested [charge_battery, charge_hydrogen]
+        exogenous: (..., 4) data for the new timestep, ordered as COLUMNS
+
+    Returns:
+        battery_storage_new: (...)
+        hydrogen_storage_new: (...)
+        action_performed: (..., 2) action actually performed
+        grid_import: (...) power imported from the grid
+    """
+    p = parameters
+
+    # Saturated action
+    charge_battery = np.clip(action[..., 0], p.charge_battery_min, p.charge_battery_max)
+    charge_hydrogen = np.clip(
+        action[..., 1], p.charge_hydrogen_min, p.charge_hydrogen_max
+    )
+
+    # Loss from electrical to chemical energy conversion
+    charging = charge_battery > 0
+    stored_battery = np.where(
+        charging, p.charge_loss_battery * charge_battery, charge_battery
+    )
+    stored_hydrogen = np.where(
+        charging, p.charge_loss_hydrogen * charge_hydrogen, charge_hydrogen
+    )
+
+    # Energy storage constraints
+    battery_storage_new = np.clip(
+        battery_storage + stored_battery, 0.0, p.battery_capacity
+    )
+    hydrogen_storage_new = np.clip(
+        hydrogen_storage + stored_hydrogen, 0.0, p.hydrogen_capacity
+    )
+
+    # Lower bound for energy storage
+    charge_battery = np.where(
+        charge_battery < 0,
+        np.maximum(battery_storage_new - battery_storage, charge_battery),
+        charge_battery,
+    )
+    charge_hydrogen = np.where(
+        charge_hydrogen < 0,
+        np.maximum(hydrogen_storage_new - hydrogen_storage, charge_hydrogen),
+        charge_hydrogen,
+    )
+
+    # Power needed from grid
+    power_in_microgrid = (
+        exogenous[..., 1] + exogenous[..., 2] - charge_hydrogen - charge_battery
+    )
+    grid_import = np.maximum(exogenous[..., 0] - power_in_microgrid, 0.0)
+
+    return (
+        battery_storage_new,
+        hydrogen_storage_new,
+        np.stack([charge_battery, charge_hydrogen], axis=-1),
+        grid_import,
+    )
+
+
+def energy_cost(
+    parameters: MicrogridParameters, grid_import: np.ndarray, exogenous: np.ndarray
+) -> np.ndarray:
+    """Cost of imported energy, the non-terminal part of RyeEnv._reward."""
+    return (exogenous[..., 3] + parameters.grid_tarrif) * grid_import
+
+
+def rollout(
+    parameters: MicrogridParameters,
+    battery_storage: np.ndarray,
+    hydrogen_storage: np.ndarray,
+    grid_import_peak: np.ndarray,
+    actions: np.ndarray,
+    exogenous: np.ndarray,
+    mask: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Simulate a batch of action sequences, one array operation per timestep.
+
+    Args:
+        parameters
+        battery_storage: (...) initial battery storage
+        hydrogen_storage: (...) initial hydrogen storage
+        grid_import_peak: (...) grid import peak before the sequence
+        actions: (..., H, 2) action sequences
+        exogenous: (..., H, 4) data of the H timesteps the actions lead into
+        mask: (..., H) timesteps that are simulated, e.g. those before the end
+            of an episode. Masked timesteps leave cost, peak and storage as is.
+
+    Returns:
+        energy_cost: (...) summed cost of imported energy
+        grid_import_peak: (...) peak after the sequence
+        battery_storage: (...) final battery storage
+        hydrogen_storage: (...) final hydrogen storage
+    """
+    shape = np.broadcast_shapes(np.shape(battery_storage), actions.shape[:-2])
+
+    battery_storage = np.broadcast_to(battery_storage, shape)
+    hydrogen_storage = np.broadcast_to(hydrogen_storage, shape)
+    grid_import_peak = np.broadcast_to(grid_import_peak, shape)
+    cost = np.zeros(shape, dtype=actions.dtype)
+
+    for step in range(actions.shape[-2]):
+        battery_storage_new, hydrogen_storage_new, _, grid_import = transition(
+            parameters,
+            battery_storage,
+            hydrogen_storage,
+            actions[..., step, :],
+            exogenous[..., step, :],
+        )
+        step_cost = energy_cost(parameters, grid_import, exogenous[..., step, :])
+        grid_import_peak_new = np.maximum(grid_import_peak, grid_import)
+
+        if mask is not None:
+            active = mask[..., step]
+            battery_storage_new = np.where(active, battery_storage_new, battery_storage)
+            hydrogen_storage_new = np.where(
+                active, hydrogen_storage_new, hydrogen_storage
+            )
+            grid_import_peak_new = np.where(
+                active, grid_import_peak_new, grid_import_peak
+            )
+            step_cost = np.where(active, step_cost, 0)
+
+        battery_storage = battery_storage_new
+        hydrogen_storage = hydrogen_storage_new
+        grid_import_peak = grid_import_peak_new
+        cost = cost + step_cost
+
+    return cost, grid_import_peak, battery_storage, hydrogen_storage
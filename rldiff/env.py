@@ -1,15 +1,29 @@
+from __future__ import annotations
+
 import numpy as np
-import pandas as pd
 import gymnasium as gym
 
 from rldiff.state import State
 from rldiff.action import Action
 from random import randrange, seed
 from datetime import datetime, timedelta
-from rldiff.type_models import InfoDictionary
-from rldiff.util import get_hour_resolution, preprocess
-from rldiff.exception import InvalidRenderModeException
-from typing import Any, Dict, List, Optional, Tuple, cast
+from rldiff.util import get_hour_resolution
+from rldiff.normalization import Normalizer
+from rldiff.preprocessing import COLUMNS, PreprocessedData, preprocess_data
+from rldiff.exception import InvalidRenderModeException, InvalidStartTimeException
+from numpy.typing import DTypeLike
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union, cast
+
+# pandas and pydantic are only needed on the data and info paths, so they are
+# not imported when a worker merely imports the environment module.
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from rldiff.type_models import InfoDictionary
+
+
+# Bump when the dynamics or reward of RyeEnv change, invalidates cached results
+ENV_VERSION = "1"
 
 
 class RyeEnv(gym.Env):
@@ -31,13 +45,20 @@ class RyeEnv(gym.Env):
         _state_space_max
         action_space
         observation_space
+        _data
         _measured_consumption_data
         _measured_photovoltaic_production_data
         _measured_wind_production_data
         _spot_market_price_data
+        _scenarios
+        _start_sampler
+        _episode_exogenous
+        _episode_start_time
         _start_date_data
         _end_date_data
         _episode_end_time
+        _dtype
+        _normalizer
         metadata
     """
 
@@ -60,43 +81,72 @@ class RyeEnv(gym.Env):
     action_space: gym.spaces.Box
     observation_space: gym.spaces.Box
 
-    _measured_consumption_data: pd.DataFrame
-    _measured_photovoltaic_production_data: pd.DataFrame
-    _measured_wind_production_data: pd.DataFrame
-    _spot_market_price_data: pd.DataFrame
+    _data: PreprocessedData
+    _measured_consumption_data: np.ndarray
+    _measured_photovoltaic_production_data: np.ndarray
+    _measured_wind_production_data: np.ndarray
+    _spot_market_price_data: np.ndarray
+
+    _scenarios: Optional[np.ndarray]
+    _start_sampler: Optional[Callable[[], datetime]]
+    _episode_exogenous: np.ndarray
+    _episode_start_time: datetime
 
     _start_time_data: datetime
     _end_time_data: datetime
     _episode_end_time: datetime
 
+    _dtype: np.dtype
+    _normalizer: Optional[Normalizer]
+
     metadata: Dict[str, List[str]]
 
     def __init__(
         self,
-        data: pd.DataFrame,
+        data: Union[pd.DataFrame, PreprocessedData],
         episode_length: timedelta = timedelta(days=30),
         random_seed: Optional[int] = None,
         charge_loss_battery: float = 0.85,
         charge_loss_hydrogen: float = 0.325,
         grid_tarrif: float = 0.05,
         peak_grid_tarrif: float = 49.0,
+        dtype: DTypeLike = np.float64,
+        scenarios: Optional[np.ndarray] = None,
+        normalizer: Optional[Normalizer] = None,
+        start_sampler: Optional[Callable[[], datetime]] = None,
     ) -> None:
         """Initializing the rye environment.
 
         Args:
-            data
+            data: raw data, or data already passed through preprocess_data
             episode_length
             random_seed
             charge_loss_battery
             charge_loss_hydrogen
             grid_tarrif
             peak_grid_tarrif
+            dtype: floating point precision of data, spaces and observations
+            scenarios: (S, L, 4) exogenous scenarios, e.g. from a ScenarioCache,
+                to draw episodes from instead of the data. L must cover the
+                episode length plus the initial hour.
+            normalizer: scales observations and rewards returned by reset and
+                step, e.g. Normalizer.from_data(data). Info keeps raw values
+                and the normalizer version that produced the output.
+            start_sampler: draws the start time when reset is given none, e.g.
+                a sampler of an EpisodeWindowIndex. Uniform over hours if None.
         """
 
         self.seed(random_seed)
 
-        # Preprocess data
-        data = preprocess(data)
+        # Preprocess data, bounds are precomputed by preprocessing
+        if not isinstance(data, PreprocessedData):
+            data = preprocess_data(data)
+
+        # Floating point precision of the whole pipeline
+        self._dtype = np.dtype(dtype)
+
+        self._data = data.astype(self._dtype)
+        data = self._data
 
         # Metadata for Gymnasium render-function
         self.metadata = {"render.modes": ["ansi"]}
@@ -113,12 +163,26 @@ class RyeEnv(gym.Env):
         self._peak_grid_tarrif = peak_grid_tarrif
 
         # Measured Data
-        self._measured_consumption_data = data.consumption
-        self._measured_wind_production_data = data.wind_production
-        self._measured_photovoltaic_production_data = data.photovoltaic_production
+        self._measured_consumption_data = data.column("consumption")
+        self._measured_wind_production_data = data.column("wind_production")
+        self._measured_photovoltaic_production_data = data.column(
+            "photovoltaic_production"
+        )
 
         # Market Data
-        self._spot_market_price_data = data.spot_market_price
+        self._spot_market_price_data = data.column("spot_market_price")
+
+        # Generated exogenous scenarios, columns ordered as the data
+        steps = int(episode_length / self._time_resolution)
+        if scenarios is not None and scenarios.shape[1] < steps + 1:
+            raise ValueError("Scenarios are shorter than the episode length.")
+
+        # Without a copy when the precision matches, e.g. a ScenarioCache memmap
+        if scenarios is not None:
+            scenarios = np.asarray(scenarios, dtype=self._dtype)
+
+        self._scenarios = scenarios
+        self._start_sampler = start_sampler
 
         # Action Space: (Using constraints from Rye infra.)
         self._action_space_min = Action(charge_battery=-400, charge_hydrogen=-100)
@@ -126,17 +190,14 @@ class RyeEnv(gym.Env):
         self._action_space_max = Action(charge_battery=400, charge_hydrogen=55)
 
         self.action_space = gym.spaces.Box(
-            low=self._action_space_min.vector,
-            high=self._action_space_max.vector,
-            dtype=np.float64,
+            low=self._action_space_min.to_vector(self._dtype),
+            high=self._action_space_max.to_vector(self._dtype),
+            dtype=self._dtype,
         )
 
         # State Space
         self._state_space_min = State(
-            consumption=self._measured_consumption_data.min(),
-            wind_production=self._measured_wind_production_data.min(),
-            photovoltaic_production=self._measured_photovoltaic_production_data.min(),
-            spot_market_price=self._spot_market_price_data.min(),
+            **dict(zip(COLUMNS, data.minimum.tolist())),
             battery_storage=0,
             hydrogen_storage=0,
             grid_import=0,
@@ -144,10 +205,7 @@ class RyeEnv(gym.Env):
         )
 
         self._state_space_max = State(
-            consumption=self._measured_consumption_data.max(),
-            wind_production=self._measured_wind_production_data.max(),
-            photovoltaic_production=self._measured_photovoltaic_production_data.max(),
-            spot_market_price=self._spot_market_price_data.max(),
+            **dict(zip(COLUMNS, data.maximum.tolist())),
             battery_storage=500,
             hydrogen_storage=1670,
             grid_import=np.inf,
@@ -155,32 +213,56 @@ class RyeEnv(gym.Env):
         )
 
         # Observation / state space
-        self.observation_space = gym.spaces.Box(
-            low=self._state_space_min.vector,
-            high=self._state_space_max.vector,
-            dtype=np.float64,
-        )
+        self._normalizer = normalizer
+        self._set_observation_space()
 
         # Start and end dates: format example -> 2020-01-01 13:00:00
-        datetime_format = "%Y-%m-%d %H:%M:%S"
-        self._start_time_data = data.time.min()
-        self._end_time_data = data.time.max()
+        self._start_time_data = data.start_time
+        self._end_time_data = data.end_time
 
         self.reset()
 
+    def _set_observation_space(self) -> None:
+        """Observation space, in normalized units when normalizing.
+
+        Infinite upper bounds are replaced by the normalizer's bound, so the
+        space is rebuilt whenever running updates change the scales.
+        """
+        normalizer = self._normalizer
+
+        if normalizer is None:
+            self.observation_space = gym.spaces.Box(
+                low=self._state_space_min.to_vector(self._dtype),
+                high=self._state_space_max.to_vector(self._dtype),
+                dtype=self._dtype,
+            )
+        else:
+            state_space_max = self._state_space_max.to_vector(np.float64)
+            state_space_max = np.where(
+                np.isinf(state_space_max), normalizer.bound, state_space_max
+            )
+
+            self.observation_space = gym.spaces.Box(
+                low=normalizer.normalize_observation(
+                    self._state_space_min.to_vector(self._dtype)
+                ),
+                high=normalizer.normalize_observation(
+                    state_space_max.astype(self._dtype)
+                ),
+                dtype=self._dtype,
+            )
+
     def get_possible_start_times(self) -> List[datetime]:
         """
         Returns a list of possible start times based on input data
         """
-        return list(
-            self._measured_photovoltaic_production_data.loc[
-                : self._end_time_data - self._episode_length
-            ].index
-        )
+        last = self._data.index_of(self._end_time_data - self._episode_length)
+
+        return [self._data.time_of(index) for index in range(last + 1)]
 
     def get_state_vector(self) -> np.ndarray:
         """Returns state vector."""
-        return self._state.vector
+        return self._state.to_vector(self._dtype)
 
     def seed(self, random_seed: Optional[int] = None) -> None:
         """
@@ -195,6 +277,7 @@ class RyeEnv(gym.Env):
         battery_storage: float = 0.0,
         hydrogen_storage: float = 0.0,
         grid_import: float = 0.0,
+        scenario: Optional[int] = None,
     ) -> np.ndarray:
         """Resets environment to intial state.
 
@@ -203,6 +286,8 @@ class RyeEnv(gym.Env):
             battery_storage
             hydrogen_storage
             grid_import
+            scenario: index of the scenario to use, random if None. Only used
+                when the environment was given scenarios.
 
         Returns:
             state: initial state object
@@ -212,25 +297,42 @@ class RyeEnv(gym.Env):
         self._cumulative_reward = 0
 
         # Setting time attributes
-        if start_time is None:
+        if start_time is None and self._start_sampler is not None:
+            self._time = get_hour_resolution(self._start_sampler())
+        elif start_time is None:
             delta = (self._end_time_data - self._episode_length) - self._start_time_data
-            random_seconds = randrange(delta.days * 24 * 30 * 30 + delta.seconds)
-            random_hours = int(random_seconds / 3600)
+            random_hours = randrange(int(delta / self._time_resolution) + 1)
             self._time = self._start_time_data + timedelta(hours=random_hours)
         else:
             self._time = get_hour_resolution(start_time)
 
         self._episode_end_time = self._time + self._episode_length
 
-        # Initial State
+        # Whole episode must lie on the data grid
+        if not (
+            self._start_time_data <= self._time
+            and self._episode_end_time <= self._end_time_data
+        ):
+            raise InvalidStartTimeException(
+                f"Episode {self._time}/{self._episode_end_time} is outside of data "
+                f"{self._start_time_data}/{self._end_time_data}."
+            )
 
+        # Exogenous data for the whole episode
+        self._episode_start_time = self._time
+
+        if self._scenarios is None:
+            row = self._data.index_of(self._time)
+            steps = self._data.index_of(self._episode_end_time) - row
+            self._episode_exogenous = self._data.values[row : row + steps + 1]
+        else:
+            if scenario is None:
+                scenario = randrange(len(self._scenarios))
+            self._episode_exogenous = self._scenarios[scenario]
+
+        # Initial State
         state = State(
-            consumption=self._measured_consumption_data.loc[self._time],
-            wind_production=self._measured_wind_production_data.loc[self._time],
-            photovoltaic_production=self._measured_photovoltaic_production_data.loc[
-                self._time
-            ],
-            spot_market_price=self._spot_market_price_data.loc[self._time],
+            **self._exogenous_at(self._time),
             battery_storage=battery_storage,
             hydrogen_storage=hydrogen_storage,
             grid_import=grid_import,
@@ -239,14 +341,31 @@ class RyeEnv(gym.Env):
 
         # Aligning initial state with state space
         state_vector = np.clip(
-            state.vector,
-            a_min=self.observation_space.low,
-            a_max=self.observation_space.high,
+            state.to_vector(self._dtype),
+            a_min=self._state_space_min.to_vector(self._dtype),
+            a_max=self._state_space_max.to_vector(self._dtype),
         )
 
         self._state = State.from_vector(cast(np.ndarray, state_vector))
 
-        return self._state.vector
+        return self._observation(self._state)
+
+    def _observation(
+        self, state: State, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Write the observation of a state into out, normalized in place."""
+        observation = state.to_vector(self._dtype, out=out)
+
+        if self._normalizer is not None:
+            self._normalizer.normalize_observation(observation, out=observation)
+
+        return observation
+
+    def _exogenous_at(self, time: datetime) -> Dict[str, float]:
+        """Returns consumption, production and price of the episode at a time."""
+        offset = (time - self._episode_start_time) // self._time_resolution
+
+        return dict(zip(COLUMNS, self._episode_exogenous[offset].tolist()))
 
     def _perform_action_on_env(
         self,
@@ -268,20 +387,19 @@ class RyeEnv(gym.Env):
             cast(
                 np.ndarray,
                 np.clip(
-                    action_array,
-                    a_min=self._action_space_min.vector,
-                    a_max=self._action_space_max.vector,
+                    np.asarray(action_array, dtype=self._dtype),
+                    a_min=self.action_space.low,
+                    a_max=self.action_space.high,
                 ),
             )
         )
 
         # Data for current timestep
-        consumption_new = self._measured_consumption_data.loc[self._time]
-        wind_production_new = self._measured_wind_production_data.loc[self._time]
-        photovoltaic_production_new = self._measured_photovoltaic_production_data.loc[
-            self._time
-        ]
-        spot_market_price = self._spot_market_price_data.loc[self._time]
+        exogenous = self._exogenous_at(self._time)
+        consumption_new = exogenous["consumption"]
+        wind_production_new = exogenous["wind_production"]
+        photovoltaic_production_new = exogenous["photovoltaic_production"]
+        spot_market_price = exogenous["spot_market_price"]
 
         # Compute loss from electrical to chemical energy conversion
         if action.charge_battery > 0:
@@ -350,7 +468,8 @@ class RyeEnv(gym.Env):
             grid_import_peak=grid_import_peak_new,
         )
 
-        return states, action
+        # Stored at the precision of the environment
+        return State.from_vector(states.to_vector(self._dtype)), action
 
     def _reward(self, state: State, done: bool) -> float:
         """Return reward of a given state.
@@ -365,17 +484,18 @@ class RyeEnv(gym.Env):
         power = (state.spot_market_price + self._grid_tariff) * state.grid_import
         peak = self._peak_grid_tarrif * state.grid_import_peak if done else 0
 
-        return power + peak
+        return float(self._dtype.type(power + peak))
 
     def step(
-        self, action: np.ndarray
-    ) -> Tuple[np.ndarray, float, bool, Dict[str, Any]]:
+        self, action: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, float, bool, InfoDictionary]:
         """
         Run one-time step of the environment's dynamics.
         Environment resets when the end of the episode is reached.
 
         Args:
             action
+            out: (8,) buffer the observation is written to, new array if None
 
         Returns:
             observation: agent observation of current environment state
@@ -383,6 +503,8 @@ class RyeEnv(gym.Env):
             done: has the current episode ended or not
             info_dictionary: contains auxiliary state information
         """
+        from rldiff.type_models import InfoDictionary
+
         self._time += self._time_resolution
 
         new_state, new_action = self._perform_action_on_env(
@@ -410,10 +532,26 @@ class RyeEnv(gym.Env):
             }
         )
 
+        # Observation and reward, normalized in the output buffer
+        observation = new_state.to_vector(self._dtype, out=out)
+
+        if self._normalizer is not None:
+            version = self._normalizer.version
+            self._normalizer.observe(observation, reward)
+
+            if self._normalizer.version != version:
+                self._set_observation_space()
+
+            self._normalizer.normalize_observation(observation, out=observation)
+            reward = self._normalizer.normalize_reward(reward)
+
+            # Scales that produced this output, for exact denormalization
+            info.info["normalizer_version"] = self._normalizer.version
+
         if done:
             self.reset()
 
-        return new_state.vector, reward, done, info
+        return observation, reward, done, info
 
     def render(self, mode: str = "ansi") -> str:
         """Render environment
@@ -0,0 +1,158 @@
+import numpy as np
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from rldiff.preprocessing import COLUMNS, TIME_RESOLUTION, PreprocessedData
+
+SEASONS = ("winter", "spring", "summer", "autumn")
+
+
+def _window_sums(values: np.ndarray, start: np.ndarray, length: int) -> np.ndarray:
+    """Sums of values[start + 1 : start + 1 + length] from one prefix sum."""
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+    return prefix[start + 1 + length] - prefix[start + 1]
+
+
+class EpisodeWindowIndex:
+    """Statistics of every episode a dataset can start, built once.
+
+    Statistics cover the hours an episode steps through and are computed from
+    prefix sums in O(T). Sampling a start, uniformly, stratified or along a
+    difficulty curriculum, is O(1) afterwards.
+
+    Attributes:
+        start_time
+        episode_length
+        statistics
+        _order
+        _strata
+    """
+
+    start_time: datetime
+    episode_length: timedelta
+    statistics: Dict[str, np.ndarray]
+
+    _order: np.ndarray
+    _strata: Dict[str, List[np.ndarray]]
+
+    def __init__(
+        self, data: PreprocessedData, episode_length: timedelta = timedelta(days=30)
+    ) -> None:
+        """Initializing the index.
+
+        Args:
+            data
+            episode_length
+        """
+        self.start_time = data.start_time
+        self.episode_length = episode_length
+
+        length = int(episode_length / TIME_RESOLUTION)
+        starts = np.arange(len(data.values) - length)
+
+        if len(starts) == 0:
+            raise ValueError("Data is shorter than the episode length.")
+
+        consumption, wind, photovoltaic, price = (
+            data.values[:, COLUMNS.index(column)].astype(np.float64)
+            for column in COLUMNS
+        )
+        renewable = wind + photovoltaic
+
+        price_mean = _window_sums(price, starts, length) / length
+        price_square_mean = _window_sums(price**2, starts, length) / length
+        consumption_sum = _window_sums(consumption, starts, length)
+        renewable_sum = _window_sums(renewable, starts, length)
+
+        months = (
+            np.datetime64(data.start_time, "h") + starts.astype("timedelta64[h]")
+        ).astype("datetime64[M]").astype(int) % 12 + 1
+
+        self.statistics = {
+            "net_load": (consumption_sum - renewable_sum) / length,
+            "price_mean": price_mean,
+            "price_volatility": np.sqrt(
+                np.maximum(price_square_mean - price_mean**2, 0.0)
+            ),
+            "renewable_share": renewable_sum / np.maximum(consumption_sum, 1e-12),
+            "season": (months % 12) // 3,
+        }
+
+        def standardized(values: np.ndarray) -> np.ndarray:
+            return (values - values.mean()) / (values.std() + 1e-12)
+
+        # High net load, volatile prices and little renewable production
+        self.statistics["difficulty"] = (
+            standardized(self.statistics["net_load"])
+            + standardized(self.statistics["price_volatility"])
+            - standardized(self.statistics["renewable_share"])
+        ) / 3
+
+        self._order = np.argsort(self.statistics["difficulty"], kind="stable")
+        self._strata = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def time_of(self, index: int) -> datetime:
+        """Returns the start time of a candidate episode."""
+        return self.start_time + int(index) * TIME_RESOLUTION
+
+    def strata(self, by: str = "season", bins: int = 4) -> List[np.ndarray]:
+        """Returns candidate indices grouped by a statistic.
+
+        Seasons are grouped by value, other statistics into `bins` quantiles.
+        Empty groups are dropped.
+        """
+        key = f"{by}/{bins}"
+
+        if key not in self._strata:
+            values = self.statistics[by]
+
+            if by == "season":
+                labels = values
+            else:
+                edges = np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])
+                labels = np.searchsorted(edges, values, side="right")
+
+            self._strata[key] = [
+                indices
+                for label in np.unique(labels)
+                if len(indices := np.flatnonzero(labels == label))
+            ]
+
+        return self._strata[key]
+
+    def sample(self, rng: np.random.Generator) -> datetime:
+        """Uniformly sampled start time."""
+        return self.time_of(rng.integers(len(self)))
+
+    def sample_stratified(
+        self, rng: np.random.Generator, by: str = "season", bins: int = 4
+    ) -> datetime:
+        """Start time from a uniformly chosen stratum, e.g. balanced seasons."""
+        strata = self.strata(by, bins)
+        stratum = strata[rng.integers(len(strata))]
+
+        return self.time_of(stratum[rng.integers(len(stratum))])
+
+    def sample_curriculum(self, rng: np.random.Generator, progress: float) -> datetime:
+        """Start time among the easiest `progress` fraction of episodes.
+
+        Args:
+            rng
+            progress: 0 samples the easiest episode, 1 samples uniformly
+        """
+        limit = max(1, int(np.ceil(np.clip(progress, 0.0, 1.0) * len(self))))
+
+        return self.time_of(self._order[rng.integers(limit)])
+
+    def season_of(self, start_time: datetime) -> Optional[str]:
+        """Returns the season of a candidate start time, None if not a candidate."""
+        index = int((start_time - self.start_time) // TIME_RESOLUTION)
+
+        if not 0 <= index < len(self):
+            return None
+
+        return SEASONS[self.statistics["season"][index]]
@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import pickle
+import shutil
+import hashlib
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from rldiff.agent import Agent
+from rldiff.env import ENV_VERSION, RyeEnv
+from rldiff.dynamics import MicrogridParameters
+from dataclasses import asdict, astuple, dataclass
+from os.path import exists, getmtime, getsize, isdir, join
+from typing import Optional
+
+CACHE_DIRECTORY = "evaluation-cache"
+
+
+@dataclass(frozen=True)
+class EpisodeCost:
+    """Cost breakdown of one episode.
+
+    Args:
+        energy_cost: spot price and grid tariff paid for imported energy
+        peak_cost: peak tariff paid on the episode's grid import peak
+        total_cost: energy_cost + peak_cost, the cumulative reward of RyeEnv
+        grid_import_peak
+        steps
+    """
+
+    energy_cost: float
+    peak_cost: float
+    total_cost: float
+    grid_import_peak: float
+    steps: int
+
+
+def policy_fingerprint(agent: Agent) -> str:
+    """Returns a hash identifying a policy.
+
+    Agents may define a `fingerprint()` method, otherwise the pickled agent is
+    hashed. Only deterministic policies should be cached, as the pickle of a
+    stochastic policy includes its random state.
+    """
+    fingerprint = getattr(agent, "fingerprint", None)
+
+    if callable(fingerprint):
+        return str(fingerprint())
+
+    return hashlib.sha256(pickle.dumps(agent)).hexdigest()
+
+
+class EvaluationCache:
+    """Two-tier cache of episode costs.
+
+    The memory tier is an LRU dictionary with at most `max_entries` results.
+    The optional disk tier stores one JSON file per result under
+    `<directory>/evaluation-cache/v<ENV_VERSION>`, evicting the least recently
+    used files once they exceed `max_bytes`. Results are stored per version and
+    keys include the dataset fingerprint, so results never outlive the
+    dynamics or data they were computed with.
+
+    When the cache is opened, only `v*` directories of other versions under
+    `<directory>/evaluation-cache` are removed, nothing else in `directory`.
+
+    Attributes:
+        _memory
+        _max_entries
+        _directory
+        _max_bytes
+        _disk_bytes
+    """
+
+    _memory: "OrderedDict[str, EpisodeCost]"
+    _max_entries: int
+    _directory: Optional[str]
+    _max_bytes: int
+    _disk_bytes: int
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 2**20,
+    ) -> None:
+        """Initializing the evaluation cache.
+
+        Args:
+            directory: root of the disk tier, memory only if None
+            max_entries: size of the memory tier
+            max_bytes: size of the disk tier
+        """
+        self._memory = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._directory = None
+        self._disk_bytes = 0
+
+        if directory is not None:
+            root = join(directory, CACHE_DIRECTORY)
+            os.makedirs(root, exist_ok=True)
+
+            for name in os.listdir(root):
+                stale = name != f"v{ENV_VERSION}" and re.fullmatch(r"v\w+", name)
+
+                if stale and isdir(join(root, name)):
+                    shutil.rmtree(join(root, name))
+
+            self._directory = join(root, f"v{ENV_VERSION}")
+            os.makedirs(self._directory, exist_ok=True)
+            self._disk_bytes = sum(
+                getsize(join(self._directory, name))
+                for name in os.listdir(self._directory)
+            )
+
+    @staticmethod
+    def key(
+        env: RyeEnv,
+        agent: Agent,
+        start_time: datetime,
+        battery_storage: float = 0.0,
+        hydrogen_storage: float = 0.0,
+    ) -> str:
+        """Returns the cache key of evaluating an agent on an episode."""
+        content = {
+            "env_version": ENV_VERSION,
+            "dataset": env._data.fingerprint,
+            "dtype": env._dtype.name,
+            "episode_length": env._episode_length / timedelta(hours=1),
+            "parameters": astuple(MicrogridParameters.from_env(env)),
+            "normalizer": (
+                None
+                if env._normalizer is None
+                else env._normalizer.observation_scale.tolist()
+            ),
+            "policy": policy_fingerprint(agent),
+            "start_time": start_time.isoformat(),
+            "battery_storage": battery_storage,
+            "hydrogen_storage": hydrogen_storage,
+        }
+
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return join(self._directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[EpisodeCost]:
+        """Returns a cached result, promoting disk hits to memory."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if self._directory is None or not exists(self._path(key)):
+            return None
+
+        with open(self._path(key)) as file:
+            cost = EpisodeCost(**json.load(file))
+
+        # Access time for least recently used eviction
+        os.utime(self._path(key))
+        self._remember(key, cost)
+
+        return cost
+
+    def put(self, key: str, cost: EpisodeCost) -> None:
+        """Store a result in memory and, if configured, on disk."""
+        self._remember(key, cost)
+
+        if self._directory is None:
+            return
+
+        path = self._path(key)
+        previous = getsize(path) if exists(path) else 0
+
+        with open(f"{path}.partial", "w") as file:
+            json.dump(asdict(cost), file)
+        os.replace(f"{path}.partial", path)
+
+        self._disk_bytes += getsize(path) - previous
+
+        if self._disk_bytes > self._max_bytes:
+            self._evict()
+
+    def _remember(self, key: str, cost: EpisodeCost) -> None:
+        self._memory[key] = cost
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Remove least recently used files until the disk tier fits."""
+        paths = sorted(
+            (join(self._directory, name) for name in os.listdir(self._directory)),
+            key=getmtime,
+        )
+
+        for path in paths:
+            if self._disk_bytes <= self._max_bytes:
+                break
+
+            self._disk_bytes -= getsize(path)
+            os.remove(path)
+
+    def clear(self) -> None:
+        """Remove all results from both tiers."""
+        self._memory.clear()
+
+        if self._directory is not None:
+            for name in os.listdir(self._directory):
+                os.remove(join(self._directory, name))
+
+            self._disk_bytes = 0
+
+
+def evaluate_policy(
+    env: RyeEnv,
+    agent: Agent,
+    start_time: datetime,
+    battery_storage: float = 0.0,
+    hydrogen_storage: float = 0.0,
+    cache: Optional[EvaluationCache] = None,
+) -> EpisodeCost:
+    """Run one episode of a deterministic policy and return its costs.
+
+    Args:
+        env
+        agent
+        start_time
+        battery_storage: initial battery storage
+        hydrogen_storage: initial hydrogen storage
+        cache: returns the stored result of an identical evaluation, if any
+
+    Returns:
+        cost: cost breakdown of the episode
+    """
+    if env._scenarios is not None:
+        raise ValueError("Episodes drawn from random scenarios cannot be cached.")
+
+    key = None
+    if cache is not None:
+        key = cache.key(env, agent, start_time, battery_storage, hydrogen_storage)
+        cost = cache.get(key)
+
+        if cost is not None:
+            return cost
+
+    observation = env.reset(
+        start_time=start_time,
+        battery_storage=battery_storage,
+        hydrogen_storage=hydrogen_storage,
+    )
+
+    done = False
+    steps = 0
+    while not done:
+        action = agent.act(observation[None])[0]
+        observation, _, done, info = env.step(action)
+        steps += 1
+
+    total_cost = info.info["cumulative_reward"]
+    grid_import_peak = info.info["state"].grid_import_peak
+    peak_cost = env._peak_grid_tarrif * grid_import_peak
+
+    cost = EpisodeCost(
+        energy_cost=total_cost - peak_cost,
+        peak_cost=peak_cost,
+        total_cost=total_cost,
+        grid_import_peak=grid_import_peak,
+        steps=steps,
+    )
+
+    if cache is not None:
+        cache.put(key, cost)
+
+    return cost
@@ -1,2 +1,10 @@
-def InvalidRenderModeException(Exception):
+class InvalidRenderModeException(Exception):
+    pass
+
+
+class DataValidationException(Exception):
+    pass
+
+
+class InvalidStartTimeException(Exception):
     pass
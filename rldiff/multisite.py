@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import numpy as np
+import gymnasium as gym
+
+from dataclasses import replace
+from random import randrange, seed
+from numpy.typing import DTypeLike
+from datetime import datetime, timedelta
+from rldiff.util import get_hour_resolution
+from rldiff.dynamics import MicrogridParameters, energy_cost, transition
+from rldiff.preprocessing import TIME_RESOLUTION, PreprocessedData, preprocess_data
+from rldiff.exception import InvalidRenderModeException, InvalidStartTimeException
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class MultiSiteRyeEnv(gym.Env):
+    """Simulator for several Rye microgrids behind one grid connection.
+
+    Every site has its own battery, hydrogen storage and exogenous data, and
+    follows the dynamics of RyeEnv. Energy is paid per site, while the peak
+    tariff is charged on the peak of the combined grid import. All site
+    quantities are held as (M, ...) arrays and stepped together.
+
+    Observations are (M, 8) arrays ordered as State.vector, where the
+    grid_import_peak column holds the shared peak of the combined import.
+    Actions are (M, 2) arrays ordered as Action.vector.
+
+    Attributes:
+        _parameters
+        _exogenous
+        _battery_storage
+        _hydrogen_storage
+        _grid_import
+        _grid_import_peak
+        _cumulative_reward
+        _time
+        _episode_length
+        _time_resolution
+        _start_time_data
+        _end_time_data
+        _episode_end_time
+        _dtype
+        action_space
+        observation_space
+        metadata
+    """
+
+    _parameters: MicrogridParameters
+    _exogenous: np.ndarray
+
+    _battery_storage: np.ndarray
+    _hydrogen_storage: np.ndarray
+    _grid_import: np.ndarray
+    _grid_import_peak: float
+    _cumulative_reward: float
+
+    _time: datetime
+    _episode_length: timedelta
+    _time_resolution: timedelta
+    _start_time_data: datetime
+    _end_time_data: datetime
+    _episode_end_time: datetime
+
+    _dtype: np.dtype
+
+    action_space: gym.spaces.Box
+    observation_space: gym.spaces.Box
+
+    metadata: Dict[str, List[str]]
+
+    def __init__(
+        self,
+        data: Sequence[Union[pd.DataFrame, PreprocessedData]],
+        episode_length: timedelta = timedelta(days=30),
+        random_seed: Optional[int] = None,
+        parameters: Optional[MicrogridParameters] = None,
+        battery_capacity: Optional[Union[float, Sequence[float]]] = None,
+        hydrogen_capacity: Optional[Union[float, Sequence[float]]] = None,
+        dtype: DTypeLike = np.float64,
+    ) -> None:
+        """Initializing the multi-site environment.
+
+        Args:
+            data: raw or preprocessed data of every site
+            episode_length
+            random_seed
+            parameters: losses, tariffs and action limits shared by the sites
+            battery_capacity: one value for all sites or one per site,
+                defaults to the capacity of the parameters
+            hydrogen_capacity: one value for all sites or one per site,
+                defaults to the capacity of the parameters
+            dtype: floating point precision of data, spaces and observations
+        """
+        self.seed(random_seed)
+
+        sites = [
+            site if isinstance(site, PreprocessedData) else preprocess_data(site)
+            for site in data
+        ]
+        n_sites = len(sites)
+
+        self._dtype = np.dtype(dtype)
+        self.metadata = {"render.modes": ["ansi"]}
+
+        self._episode_length = episode_length
+        self._time_resolution = TIME_RESOLUTION
+
+        # Per site storage capacities
+        parameters = parameters or MicrogridParameters()
+
+        if battery_capacity is None:
+            battery_capacity = parameters.battery_capacity
+        if hydrogen_capacity is None:
+            hydrogen_capacity = parameters.hydrogen_capacity
+
+        self._parameters = replace(
+            parameters,
+            battery_capacity=np.broadcast_to(
+                np.asarray(battery_capacity, self._dtype), n_sites
+            ),
+            hydrogen_capacity=np.broadcast_to(
+                np.asarray(hydrogen_capacity, self._dtype), n_sites
+            ),
+        )
+
+        # Sites share the hours covered by all of them
+        self._start_time_data = max(site.start_time for site in sites)
+        self._end_time_data = min(site.end_time for site in sites)
+
+        if self._start_time_data + episode_length > self._end_time_data:
+            raise ValueError("Sites do not share an episode worth of data.")
+
+        rows = [
+            slice(
+                site.index_of(self._start_time_data),
+                site.index_of(self._end_time_data) + 1,
+            )
+            for site in sites
+        ]
+        self._exogenous = np.stack(
+            [site.values[row] for site, row in zip(sites, rows)]
+        ).astype(self._dtype)
+
+        # Action Space, limits may be shared or given per site
+        p = self._parameters
+        action_min = np.stack(
+            np.broadcast_arrays(p.charge_battery_min, p.charge_hydrogen_min), -1
+        )
+        action_max = np.stack(
+            np.broadcast_arrays(p.charge_battery_max, p.charge_hydrogen_max), -1
+        )
+
+        self.action_space = gym.spaces.Box(
+            low=np.broadcast_to(action_min, (n_sites, 2)).astype(self._dtype),
+            high=np.broadcast_to(action_max, (n_sites, 2)).astype(self._dtype),
+            dtype=self._dtype,
+        )
+
+        # Observation Space
+        minimum = np.stack([site.minimum for site in sites])
+        maximum = np.stack([site.maximum for site in sites])
+        zeros = np.zeros(n_sites)
+        infinite = np.full(n_sites, np.inf)
+
+        self.observation_space = gym.spaces.Box(
+            low=self._observation(minimum, zeros, zeros, zeros, 0.0),
+            high=self._observation(
+                maximum, p.battery_capacity, p.hydrogen_capacity, infinite, np.inf
+            ),
+            dtype=self._dtype,
+        )
+
+        self.reset()
+
+    @property
+    def n_sites(self) -> int:
+        return len(self._exogenous)
+
+    def seed(self, random_seed: Optional[int] = None) -> None:
+        """
+        Setting random number generator seed for reproducibility.
+        """
+        if random_seed is not None:
+            seed(random_seed)
+
+    def _row(self, time: datetime) -> int:
+        return int((time - self._start_time_data) // self._time_resolution)
+
+    def _observation(
+        self,
+        exogenous: np.ndarray,
+        battery_storage: np.ndarray,
+        hydrogen_storage: np.ndarray,
+        grid_import: np.ndarray,
+        grid_import_peak: float,
+    ) -> np.ndarray:
+        """Assemble (M, 8) observations in State.vector order."""
+        observation = np.empty((len(exogenous), 8), dtype=self._dtype)
+
+        observation[:, 0:3] = exogenous[:, 0:3]
+        observation[:, 3] = battery_storage
+        observation[:, 4] = hydrogen_storage
+        observation[:, 5] = grid_import
+        observation[:, 6] = grid_import_peak
+        observation[:, 7] = exogenous[:, 3]
+
+        return observation
+
+    def get_state_vector(self) -> np.ndarray:
+        """Returns (M, 8) state array."""
+        return self._observation(
+            self._exogenous[:, self._row(self._time)],
+            self._battery_storage,
+            self._hydrogen_storage,
+            self._grid_import,
+            self._grid_import_peak,
+        )
+
+    def reset(
+        self,
+        start_time: Optional[datetime] = None,
+        battery_storage: Union[float, np.ndarray] = 0.0,
+        hydrogen_storage: Union[float, np.ndarray] = 0.0,
+        grid_import: Union[float, np.ndarray] = 0.0,
+    ) -> np.ndarray:
+        """Resets environment to intial state.
+
+        Args:
+            start_time
+            battery_storage: one value for all sites or one per site
+            hydrogen_storage: one value for all sites or one per site
+            grid_import: one value for all sites or one per site
+
+        Returns:
+            state: (M, 8) initial state array
+        """
+        self._cumulative_reward = 0.0
+
+        last_start = self._row(self._end_time_data - self._episode_length)
+
+        if start_time is None:
+            self._time = self._start_time_data + randrange(last_start + 1) * (
+                self._time_resolution
+            )
+        else:
+            self._time = get_hour_resolution(start_time)
+
+        self._episode_end_time = self._time + self._episode_length
+
+        if not 0 <= self._row(self._time) <= last_start:
+            raise InvalidStartTimeException(
+                f"Episode {self._time}/{self._episode_end_time} is outside of data "
+                f"{self._start_time_data}/{self._end_time_data}."
+            )
+
+        p = self._parameters
+        shape = (self.n_sites,)
+
+        self._battery_storage = np.clip(
+            np.broadcast_to(battery_storage, shape), 0.0, p.battery_capacity
+        ).astype(self._dtype)
+        self._hydrogen_storage = np.clip(
+            np.broadcast_to(hydrogen_storage, shape), 0.0, p.hydrogen_capacity
+        ).astype(self._dtype)
+        self._grid_import = np.clip(
+            np.broadcast_to(grid_import, shape), 0.0, None
+        ).astype(self._dtype)
+        self._grid_import_peak = float(self._grid_import.sum())
+
+        return self.get_state_vector()
+
+    def step(
+        self, action: np.ndarray
+    ) -> Tuple[np.ndarray, float, bool, Dict[str, Any]]:
+        """
+        Run one-time step of the dynamics of all sites.
+        Environment resets when the end of the episode is reached.
+
+        Args:
+            action: (M, 2) actions
+
+        Returns:
+            observation: (M, 8) agent observation of all sites
+            reward: cost of all sites, including the shared peak when done
+            done: has the current episode ended or not
+            info: time, actions performed, per site and combined grid import,
+                reward and cumulative reward
+        """
+        self._time += self._time_resolution
+        exogenous = self._exogenous[:, self._row(self._time)]
+
+        (
+            self._battery_storage,
+            self._hydrogen_storage,
+            action_performed,
+            self._grid_import,
+        ) = transition(
+            self._parameters,
+            self._battery_storage,
+            self._hydrogen_storage,
+            np.asarray(action, dtype=self._dtype),
+            exogenous,
+        )
+
+        combined_import = float(self._grid_import.sum())
+        self._grid_import_peak = max(self._grid_import_peak, combined_import)
+
+        done = self._time >= self._episode_end_time
+
+        reward = float(
+            energy_cost(self._parameters, self._grid_import, exogenous).sum()
+        )
+        if done:
+            reward += self._parameters.peak_grid_tarrif * self._grid_import_peak
+
+        self._cumulative_reward += reward
+
+        observation = self._observation(
+            exogenous,
+            self._battery_storage,
+            self._hydrogen_storage,
+            self._grid_import,
+            self._grid_import_peak,
+        )
+        info = {
+            "time": self._time,
+            "action": action_performed,
+            "grid_import": self._grid_import,
+            "combined_grid_import": combined_import,
+            "reward": reward,
+            "cumulative_reward": self._cumulative_reward,
+        }
+
+        if done:
+            self.reset()
+
+        return observation, reward, done, info
+
+    def render(self, mode: str = "ansi") -> str:
+        """Render environment
+
+        Args:
+            mode
+
+        Returns:
+            ansi: String contaning terminal-style text representation
+        """
+
+        match mode:
+            case "ansi":
+                return (
+                    f"Step {self._time}/{self._episode_end_time} "
+                    f"have state {self.get_state_vector()}"
+                )
+            case _:
+                raise InvalidRenderModeException(f"Mode {mode} is not available.")
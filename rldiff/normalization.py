@@ -0,0 +1,174 @@
+import numpy as np
+
+from typing import List, Optional, Tuple
+from rldiff.preprocessing import PreprocessedData
+from rldiff.dynamics import MicrogridParameters
+
+
+def _power_of_two(bound: np.ndarray) -> np.ndarray:
+    """Smallest power of two that is at least bound, 1 where bound is 0."""
+    bound = np.maximum(np.asarray(bound, dtype=np.float64), np.finfo(np.float32).tiny)
+
+    return 2.0 ** np.ceil(np.log2(bound))
+
+
+class Normalizer:
+    """Scaling of observations and rewards by powers of two.
+
+    Multiplying by a power of two only changes the floating point exponent, so
+    normalize and denormalize are exact inverses of each other. Observations are
+    scaled into [-1, 1] as long as they stay within the bounds the normalizer
+    was built from. With running updates, a scale is doubled whenever an
+    observed magnitude exceeds it. Every change of the scales starts a new
+    version, and outputs of earlier versions are denormalized with the scales
+    of their version.
+
+    Attributes:
+        bound
+        observation_scale
+        reward_scale
+        update
+        version
+        _scales
+        _observation_inverse
+        _reward_inverse
+    """
+
+    bound: np.ndarray
+    observation_scale: np.ndarray
+    reward_scale: float
+    update: bool
+    version: int
+
+    _scales: List[Tuple[np.ndarray, float]]
+    _observation_inverse: np.ndarray
+    _reward_inverse: float
+
+    def __init__(
+        self, bound: np.ndarray, reward_bound: float, update: bool = False
+    ) -> None:
+        """Initializing the normalizer.
+
+        Args:
+            bound: (8,) largest magnitude of every entry of the state vector
+            reward_bound: largest magnitude of a reward
+            update: grow scales when larger values are observed
+        """
+        self.bound = np.asarray(bound, dtype=np.float64)
+        self.update = update
+        self._scales = []
+        self._set_scales(_power_of_two(self.bound), float(_power_of_two(reward_bound)))
+
+    @classmethod
+    def from_data(
+        cls,
+        data: PreprocessedData,
+        parameters: Optional[MicrogridParameters] = None,
+        update: bool = False,
+    ) -> "Normalizer":
+        """Build a normalizer from precomputed data bounds and physical limits.
+
+        Grid import is bounded by the largest consumption plus the largest
+        charging of both storages, as production is never negative. The reward
+        bound is the largest cost of one hour of energy, so the terminal peak
+        charge can exceed 1 after scaling.
+
+        Args:
+            data
+            parameters: physical limits and tariffs, defaults to the Rye values
+            update: grow scales when larger values are observed
+
+        Returns:
+            normalizer
+        """
+        p = parameters or MicrogridParameters()
+        magnitude = np.maximum(np.abs(data.minimum), np.abs(data.maximum))
+        consumption, wind, photovoltaic, price = magnitude
+
+        grid_import = consumption + max(p.charge_battery_max, 0.0)
+        grid_import += max(p.charge_hydrogen_max, 0.0)
+
+        bound = np.array(
+            [
+                consumption,
+                wind,
+                photovoltaic,
+                np.max(p.battery_capacity),
+                np.max(p.hydrogen_capacity),
+                grid_import,
+                grid_import,
+                price,
+            ]
+        )
+        reward_bound = (price + np.max(np.abs(p.grid_tarrif))) * grid_import
+
+        return cls(bound, reward_bound, update)
+
+    def _set_scales(self, observation_scale: np.ndarray, reward_scale: float) -> None:
+        self.observation_scale = observation_scale
+        self.reward_scale = reward_scale
+        self._scales.append((observation_scale, reward_scale))
+        self.version = len(self._scales) - 1
+        self._observation_inverse = 1.0 / observation_scale
+        self._reward_inverse = 1.0 / reward_scale
+
+    def observe(self, observation: np.ndarray, reward: float) -> None:
+        """Grow the bound and scales to cover a raw observation and reward.
+
+        Does nothing unless updating.
+        """
+        if not self.update:
+            return
+
+        magnitude = np.abs(observation)
+
+        self.bound = np.maximum(self.bound, magnitude)
+
+        if (magnitude > self.observation_scale).any() or abs(
+            reward
+        ) > self.reward_scale:
+            self._set_scales(
+                np.maximum(self.observation_scale, _power_of_two(magnitude)),
+                max(self.reward_scale, float(_power_of_two(abs(reward)))),
+            )
+
+    def normalize_observation(
+        self, observation: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Scale an observation, in place when out is the observation itself."""
+        if out is None:
+            out = np.empty_like(observation)
+
+        return np.multiply(
+            observation, self._observation_inverse, out=out, casting="same_kind"
+        )
+
+    def denormalize_observation(
+        self,
+        observation: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        version: Optional[int] = None,
+    ) -> np.ndarray:
+        """Exact inverse of normalize_observation.
+
+        Args:
+            observation
+            out
+            version: version of the scales the observation was normalized
+                with, the current one if None
+        """
+        if out is None:
+            out = np.empty_like(observation)
+
+        scale = self.observation_scale if version is None else self._scales[version][0]
+
+        return np.multiply(observation, scale, out=out, casting="same_kind")
+
+    def normalize_reward(self, reward: float) -> float:
+        return reward * self._reward_inverse
+
+    def denormalize_reward(self, reward: float, version: Optional[int] = None) -> float:
+        """Exact inverse of normalize_reward, see denormalize_observation."""
+        scale = self.reward_scale if version is None else self._scales[version][1]
+
+        return reward * scale
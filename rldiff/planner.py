@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import time
+import numpy as np
+
+from dataclasses import dataclass
+from rldiff.preprocessing import COLUMNS
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from rldiff.diffusion import MLPDenoiser, NoiseSchedule, ddim_sample
+from rldiff.dynamics import MicrogridParameters, rollout
+
+if TYPE_CHECKING:
+    from rldiff.env import RyeEnv
+
+
+# State vector columns holding consumption, production and price, as COLUMNS
+EXOGENOUS_STATE_COLUMNS = [0, 1, 2, 7]
+
+
+@dataclass
+class PlanReport:
+    """Latency and outcome of one planning call.
+
+    Args:
+        decisions: number of states planned for
+        samples: candidate sequences per decision
+        steps: denoising passes
+        encode_seconds: time spent encoding the conditions
+        denoise_seconds: time spent in the denoising passes
+        score_seconds: time spent simulating the candidates
+        total_seconds
+        best_cost: (decisions,) cost of the selected sequences
+    """
+
+    decisions: int
+    samples: int
+    steps: int
+    encode_seconds: float
+    denoise_seconds: float
+    score_seconds: float
+    total_seconds: float
+    best_cost: np.ndarray
+
+    @property
+    def seconds_per_decision(self) -> float:
+        return self.total_seconds / self.decisions
+
+
+def sequence_windows(
+    observations: np.ndarray, actions: np.ndarray, horizon: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Cut one episode into planner training examples.
+
+    The exogenous window of the action taken at step t is the data seen in the
+    observations of steps t + 1 to t + horizon.
+
+    Args:
+        observations: (T, 8) observations of an episode
+        actions: (T, 2) actions taken after each observation
+        horizon
+
+    Returns:
+        states: (N, 8) observations the sequences start from
+        exogenous: (N, horizon, 4) data during each sequence
+        sequences: (N, horizon, 2) actions taken
+    """
+    starts = np.arange(len(observations) - horizon)
+    offsets = starts[:, None] + np.arange(horizon)
+
+    return (
+        observations[starts],
+        observations[offsets + 1][..., EXOGENOUS_STATE_COLUMNS],
+        actions[offsets],
+    )
+
+
+class DiffusionPlanner:
+    """Diffusion model over (H, 2) action sequences for receding horizon control.
+
+    The denoiser is conditioned on the current state and the exogenous window
+    of the next H hours. For each decision the condition is encoded once and
+    reused by every denoising pass of every candidate, candidates are
+    simulated with the dynamics and reward of RyeEnv, and the cheapest one is
+    selected.
+
+    Attributes:
+        horizon
+        parameters
+        schedule
+        denoiser
+        reports
+        _condition_mean
+        _condition_std
+        _action_low
+        _action_high
+        _random_seed
+    """
+
+    horizon: int
+    parameters: MicrogridParameters
+    schedule: NoiseSchedule
+    denoiser: MLPDenoiser
+    reports: List[PlanReport]
+
+    _condition_mean: np.ndarray
+    _condition_std: np.ndarray
+    _action_low: np.ndarray
+    _action_high: np.ndarray
+    _random_seed: Optional[int]
+
+    def __init__(
+        self,
+        horizon: int = 24,
+        parameters: Optional[MicrogridParameters] = None,
+        hidden_size: int = 256,
+        diffusion_steps: int = 1000,
+        random_seed: Optional[int] = None,
+    ) -> None:
+        """Initializing the planner.
+
+        Args:
+            horizon: hours planned ahead
+            parameters: dynamics and tariffs used to score candidates
+            hidden_size: width of the denoiser
+            diffusion_steps: number of steps in the noise schedule
+            random_seed
+        """
+        self.horizon = horizon
+        self.parameters = parameters or MicrogridParameters()
+        self.schedule = NoiseSchedule(diffusion_steps)
+        self.denoiser = MLPDenoiser(
+            horizon * 2,
+            condition_size=8 + horizon * len(COLUMNS),
+            hidden_size=hidden_size,
+            random_seed=random_seed,
+        )
+        self.reports = []
+
+        p = self.parameters
+        self._action_low = np.array([p.charge_battery_min, p.charge_hydrogen_min])
+        self._action_high = np.array([p.charge_battery_max, p.charge_hydrogen_max])
+        self._random_seed = random_seed
+
+    def _condition(self, states: np.ndarray, exogenous: np.ndarray) -> np.ndarray:
+        condition = np.concatenate(
+            [states, exogenous.reshape(len(exogenous), -1)], axis=1
+        )
+
+        return ((condition - self._condition_mean) / self._condition_std).astype(
+            np.float32
+        )
+
+    def _scale_actions(self, sequences: np.ndarray) -> np.ndarray:
+        """Map actions to [-1, 1] and flatten the sequences."""
+        middle = (self._action_high + self._action_low) / 2
+        half_range = (self._action_high - self._action_low) / 2
+
+        return ((sequences - middle) / half_range).reshape(len(sequences), -1)
+
+    def _unscale_actions(self, samples: np.ndarray) -> np.ndarray:
+        middle = (self._action_high + self._action_low) / 2
+        half_range = (self._action_high - self._action_low) / 2
+        samples = np.clip(samples, -1.0, 1.0).reshape(*samples.shape[:-1], -1, 2)
+
+        return samples * half_range + middle
+
+    def fit(
+        self,
+        states: np.ndarray,
+        exogenous: np.ndarray,
+        sequences: np.ndarray,
+        epochs: int = 2000,
+        batch_size: int = 128,
+        learning_rate: float = 1e-3,
+    ) -> List[float]:
+        """
+        Train the denoiser on action sequences, e.g. from sequence_windows.
+
+        Args:
+            states: (N, 8)
+            exogenous: (N, H, 4)
+            sequences: (N, H, 2)
+            epochs: number of minibatch updates
+            batch_size
+            learning_rate
+
+        Returns:
+            losses: training loss per update
+        """
+        rng = np.random.default_rng(self._random_seed)
+
+        condition = np.concatenate(
+            [states, exogenous.reshape(len(exogenous), -1)], axis=1
+        )
+        self._condition_mean = condition.mean(axis=0)
+        self._condition_std = condition.std(axis=0) + 1e-8
+
+        condition = self._condition(states, exogenous)
+        targets = self._scale_actions(sequences).astype(np.float32)
+
+        losses = []
+        for _ in range(epochs):
+            batch = rng.integers(0, len(targets), batch_size)
+            losses.append(
+                self.denoiser.train_step(
+                    targets[batch],
+                    self.schedule,
+                    rng,
+                    condition[batch],
+                    learning_rate,
+                )
+            )
+
+        return losses
+
+    def plan(
+        self,
+        states: np.ndarray,
+        exogenous: np.ndarray,
+        samples: int = 64,
+        steps: int = 10,
+        random_seed: Optional[int] = None,
+        remaining: Optional[np.ndarray] = None,
+        parameters: Optional[MicrogridParameters] = None,
+    ) -> Tuple[np.ndarray, PlanReport]:
+        """Sample, score and select action sequences for a batch of decisions.
+
+        Candidates are scored by the cost RyeEnv charges for them: the energy
+        they import plus the peak tariff on the increase of the grid import
+        peak, or on the whole peak if the episode ends within the horizon.
+        Hours after the end of the episode are not charged.
+
+        Args:
+            states: (B, 8) current raw state vectors
+            exogenous: (B, H, 4) data of the next H hours
+            samples: candidate sequences per decision
+            steps: DDIM denoising passes
+            random_seed
+            remaining: (B,) hours left in the episode, unbounded if None
+            parameters: dynamics and tariffs of the environment, defaults to
+                the parameters of the planner
+
+        Returns:
+            sequences: (B, H, 2) selected action sequences
+            report: latency and cost of the call
+        """
+        rng = np.random.default_rng(random_seed)
+        decisions = len(states)
+        started = time.perf_counter()
+
+        # Condition encoding is shared by all candidates and denoising passes
+        encoded = np.repeat(
+            self.denoiser.encode_condition(self._condition(states, exogenous)),
+            samples,
+            axis=0,
+        )
+        encoded_time = time.perf_counter()
+
+        noise = rng.standard_normal((decisions * samples, self.horizon * 2)).astype(
+            np.float32
+        )
+        candidates = self._unscale_actions(
+            ddim_sample(self.denoiser, self.schedule, noise, steps, encoded, clip=1.0)
+        ).reshape(decisions, samples, self.horizon, 2)
+        denoised_time = time.perf_counter()
+
+        # Score candidates with the environment's dynamics and reward
+        parameters = parameters or self.parameters
+
+        if remaining is None:
+            remaining = np.full(decisions, np.iinfo(np.int64).max)
+
+        remaining = np.asarray(remaining)
+        episode_end = remaining <= self.horizon
+
+        peak = states[:, None, 6]
+        energy, peak_new, _, _ = rollout(
+            parameters,
+            states[:, None, 3],
+            states[:, None, 4],
+            peak,
+            candidates,
+            exogenous[:, None],
+            mask=(np.arange(self.horizon) < remaining[:, None])[:, None],
+        )
+
+        peak_charged = np.where(episode_end[:, None], peak_new, peak_new - peak)
+        cost = energy + parameters.peak_grid_tarrif * peak_charged
+
+        best = np.argmin(cost, axis=1)
+        sequences = candidates[np.arange(decisions), best]
+        scored_time = time.perf_counter()
+
+        report = PlanReport(
+            decisions=decisions,
+            samples=samples,
+            steps=steps,
+            encode_seconds=encoded_time - started,
+            denoise_seconds=denoised_time - encoded_time,
+            score_seconds=scored_time - denoised_time,
+            total_seconds=scored_time - started,
+            best_cost=cost[np.arange(decisions), best],
+        )
+        self.reports.append(report)
+
+        return sequences, report
+
+    def act_on_env(self, env: RyeEnv, **options) -> np.ndarray:
+        """Plan from the current state of a RyeEnv and return the first action.
+
+        Candidates are scored with the parameters of the environment. Hours
+        past the end of the episode are not charged.
+
+        Args:
+            env
+            options: keyword arguments for plan
+
+        Returns:
+            action: (2,) action to perform now
+        """
+        offset = (env._time - env._episode_start_time) // env._time_resolution
+        rows = np.minimum(
+            offset + 1 + np.arange(self.horizon), len(env._episode_exogenous) - 1
+        )
+        remaining = (env._episode_end_time - env._time) // env._time_resolution
+
+        sequences, _ = self.plan(
+            env.get_state_vector().astype(np.float64)[None],
+            np.asarray(env._episode_exogenous[rows], dtype=np.float64)[None],
+            remaining=np.array([remaining]),
+            parameters=MicrogridParameters.from_env(env),
+            **options,
+        )
+
+        return sequences[0, 0]
+
+    def latency(self) -> Dict[str, float]:
+        """Summary of the per-decision latency of all planning calls so far."""
+        seconds = np.array([report.seconds_per_decision for report in self.reports])
+
+        if len(seconds) == 0:
+            return {"calls": 0}
+
+        return {
+            "calls": len(seconds),
+            "mean": float(seconds.mean()),
+            "p50": float(np.percentile(seconds, 50)),
+            "p95": float(np.percentile(seconds, 95)),
+            "max": float(seconds.max()),
+        }
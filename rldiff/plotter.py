@@ -1,6 +1,3 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Dict, List, cast
@@ -49,6 +46,9 @@ class RyeEnvironmentEpisodePlotter:
         Args:
             show: boolean for if the plot should be shown
         """
+        import pandas as pd
+        import matplotlib.pyplot as plt
+
         _actions = pd.DataFrame(self._actions, index=self._times)
         _rewards = pd.DataFrame(self._rewards, index=self._times)
         _states = pd.DataFrame(self._states, index=self._times)
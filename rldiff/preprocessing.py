@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import hashlib
+import numpy as np
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from functools import cached_property
+from numpy.typing import DTypeLike
+from os.path import exists, getmtime, splitext
+from rldiff.exception import DataValidationException
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+COLUMNS: Tuple[str, ...] = (
+    "consumption",
+    "wind_production",
+    "photovoltaic_production",
+    "spot_market_price",
+)
+
+TIME_RESOLUTION = timedelta(hours=1)
+
+INTERPOLATION_METHODS = ("linear", "ffill", "bfill")
+DUPLICATE_POLICIES = ("mean", "first", "last")
+
+# Physically valid ranges for each exogenous series
+DEFAULT_RANGES: Dict[str, Tuple[float, float]] = {
+    "consumption": (0.0, np.inf),
+    "wind_production": (0.0, np.inf),
+    "photovoltaic_production": (0.0, np.inf),
+    "spot_market_price": (-np.inf, np.inf),
+}
+
+
+@dataclass
+class PreprocessedData:
+    """Exogenous Rye data on a dense hourly grid.
+
+    Args:
+        start_time: first hour of the grid
+        values: (T, 4) array with one column per entry in COLUMNS
+        minimum: (4,) per-column minimum, used for the observation space
+        maximum: (4,) per-column maximum, used for the observation space
+        filled: (T,) mask of hours that were missing or NaN and got interpolated
+    """
+
+    start_time: datetime
+    values: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    filled: np.ndarray
+
+    @property
+    def end_time(self) -> datetime:
+        return self.start_time + (len(self.values) - 1) * TIME_RESOLUTION
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the series for a column in COLUMNS."""
+        return self.values[:, COLUMNS.index(name)]
+
+    def index_of(self, time: datetime) -> int:
+        """Returns the row of an hour on the grid."""
+        return int((time - self.start_time) // TIME_RESOLUTION)
+
+    def time_of(self, index: int) -> datetime:
+        """Returns the hour of a row on the grid."""
+        return self.start_time + index * TIME_RESOLUTION
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Hash of the grid start, values and dtype."""
+        digest = hashlib.sha256(str(self.start_time).encode())
+        digest.update(str(self.values.dtype).encode())
+        digest.update(np.ascontiguousarray(self.values).tobytes())
+
+        return digest.hexdigest()
+
+    def astype(self, dtype: DTypeLike) -> "PreprocessedData":
+        """Returns the data with values at another floating point precision."""
+        return replace(self, values=self.values.astype(dtype, copy=False))
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Data as a DataFrame with a DatetimeIndex."""
+        import pandas as pd
+
+        index = pd.date_range(self.start_time, periods=len(self.values), freq="h")
+
+        return pd.DataFrame(self.values, index=index, columns=list(COLUMNS))
+
+    def save(self, path: str, options: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Store preprocessed data as an uncompressed .npz archive.
+
+        Args:
+            path
+            options: preprocessing options stored for cache validation
+        """
+        np.savez(
+            path,
+            start_time=np.datetime64(self.start_time, "s"),
+            values=self.values,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            filled=self.filled,
+            options=json.dumps(options or {}, sort_keys=True),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PreprocessedData":
+        with np.load(path) as archive:
+            return cls(
+                start_time=archive["start_time"].item(),
+                values=archive["values"],
+                minimum=archive["minimum"],
+                maximum=archive["maximum"],
+                filled=archive["filled"],
+            )
+
+
+def _longest_gap(missing: np.ndarray) -> int:
+    """Returns the longest run of True values in a boolean array."""
+    padded = np.concatenate(([0], missing.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+
+    return int((edges[1::2] - edges[::2]).max()) if len(edges) else 0
+
+
+def preprocess_data(
+    data: pd.DataFrame,
+    interpolation: str = "linear",
+    max_gap: Optional[int] = None,
+    duplicates: str = "mean",
+    ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> PreprocessedData:
+    """Reindex data onto a dense hourly grid, fill gaps and validate it.
+
+    Timestamps are taken from the `time` column, or the index if there is none.
+    Timezone-aware timestamps are converted to UTC. Naive timestamps repeated by
+    a DST transition are merged according to `duplicates`, and the hour skipped
+    by a DST transition is filled like any other gap.
+
+    Args:
+        data: raw Rye data
+        interpolation: one of INTERPOLATION_METHODS
+        max_gap: longest run of missing hours that may be filled, unbounded if None
+        duplicates: one of DUPLICATE_POLICIES, how to merge rows in the same hour
+        ranges: valid (min, max) per column, defaults to DEFAULT_RANGES
+
+    Returns:
+        preprocessed: dense data with precomputed bounds
+    """
+    import pandas as pd
+
+    if interpolation not in INTERPOLATION_METHODS:
+        raise ValueError(f"Interpolation {interpolation} is not available.")
+
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"Duplicate policy {duplicates} is not available.")
+
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+
+    missing_columns = [column for column in COLUMNS if column not in data.columns]
+    if missing_columns:
+        raise DataValidationException(f"Missing columns {missing_columns}.")
+
+    # Timestamps
+    if "time" in data.columns:
+        time = pd.DatetimeIndex(pd.to_datetime(data["time"]))
+    elif isinstance(data.index, pd.DatetimeIndex):
+        time = data.index
+    else:
+        raise DataValidationException("Data has no time column or DatetimeIndex.")
+
+    if time.tz is not None:
+        time = time.tz_convert("UTC").tz_localize(None)
+
+    if time.hasnans:
+        raise DataValidationException("Data has missing timestamps.")
+
+    # Column dtypes
+    columns: Dict[str, np.ndarray] = {}
+    for column in COLUMNS:
+        try:
+            columns[column] = pd.to_numeric(data[column]).to_numpy(dtype=np.float64)
+        except (TypeError, ValueError) as error:
+            raise DataValidationException(
+                f"Column {column} is not numeric: {error}"
+            ) from error
+
+    frame = pd.DataFrame(columns, index=time.floor("h"))
+
+    # Merge rows falling in the same hour (DST duplicates, sub-hourly data)
+    frame = getattr(frame.groupby(level=0, sort=True), duplicates)()
+
+    # Dense hourly grid
+    grid = pd.date_range(frame.index[0], frame.index[-1], freq="h")
+    frame = frame.reindex(grid)
+
+    missing = frame.isna().to_numpy()
+    if max_gap is not None:
+        for position, column in enumerate(COLUMNS):
+            gap = _longest_gap(missing[:, position])
+            if gap > max_gap:
+                raise DataValidationException(
+                    f"Column {column} has a gap of {gap} hours, "
+                    f"longer than max_gap={max_gap}."
+                )
+
+    match interpolation:
+        case "linear":
+            frame = frame.interpolate(method="linear", limit_direction="both")
+        case "ffill":
+            frame = frame.ffill().bfill()
+        case "bfill":
+            frame = frame.bfill().ffill()
+
+    values = frame.to_numpy(dtype=np.float64)
+
+    # Value ranges
+    for position, column in enumerate(COLUMNS):
+        series = values[:, position]
+        low, high = ranges[column]
+        invalid = ~np.isfinite(series) | (series < low) | (series > high)
+
+        if invalid.any():
+            first = grid[int(np.argmax(invalid))]
+            raise DataValidationException(
+                f"Column {column} has {int(invalid.sum())} values outside "
+                f"[{low}, {high}], first at {first}."
+            )
+
+    return PreprocessedData(
+        start_time=grid[0].to_pydatetime(),
+        values=values,
+        minimum=values.min(axis=0),
+        maximum=values.max(axis=0),
+        filled=missing.any(axis=1),
+    )
+
+
+def preprocessed_path(path: str) -> str:
+    """Returns the path preprocessed data is stored at next to a CSV file."""
+    return f"{splitext(path)[0]}.preprocessed.npz"
+
+
+def load_preprocessed(path: str, **options: Any) -> PreprocessedData:
+    """
+    Load preprocessed data stored next to a CSV file, building it if missing.
+
+    The stored result is rebuilt when the CSV is newer or when it was built
+    with different preprocessing options.
+
+    Args:
+        path: CSV file with Rye data
+        options: keyword arguments for preprocess_data
+
+    Returns:
+        preprocessed
+    """
+    cache_path = preprocessed_path(path)
+    options_key = json.dumps(options, sort_keys=True)
+
+    if exists(cache_path) and getmtime(cache_path) >= getmtime(path):
+        with np.load(cache_path) as archive:
+            stored_key = str(archive["options"])
+
+        if stored_key == options_key:
+            return PreprocessedData.load(cache_path)
+
+    import pandas as pd
+
+    preprocessed = preprocess_data(pd.read_csv(path), **options)
+    preprocessed.save(cache_path, options)
+
+    return preprocessed
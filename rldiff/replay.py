@@ -0,0 +1,328 @@
+import json
+import time
+import struct
+import numpy as np
+
+from os.path import exists, getsize
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from rldiff.env import ENV_VERSION, RyeEnv
+from rldiff.dynamics import MicrogridParameters, rollout
+from rldiff.preprocessing import TIME_RESOLUTION, PreprocessedData
+from numpy.typing import DTypeLike
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+MAGIC = b"RLDACT01"
+
+
+def record_dtype(steps: int, dtype: DTypeLike) -> np.dtype:
+    """Fixed-size record of one episode in an action log.
+
+    Start hours count from 1970-01-01, actions are stored in the precision of
+    the environment that took them.
+    """
+    return np.dtype(
+        [
+            ("start_hour", "<i8"),
+            ("battery_storage", "<f8"),
+            ("hydrogen_storage", "<f8"),
+            ("grid_import", "<f8"),
+            ("cost", "<f8"),
+            ("actions", np.dtype(dtype).newbyteorder("<"), (steps, 2)),
+        ]
+    )
+
+
+def _read_header(file: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not an action log.")
+
+    (length,) = struct.unpack("<I", file.read(4))
+    header = json.loads(file.read(length))
+
+    return header, len(MAGIC) + 4 + length
+
+
+def _write_header(file: BinaryIO, header: Dict[str, Any]) -> None:
+    encoded = json.dumps(header, sort_keys=True).encode()
+
+    # Records start 8-byte aligned
+    encoded += b" " * (-(len(MAGIC) + 4 + len(encoded)) % 8)
+
+    file.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+
+
+class ActionLog:
+    """Recorded episodes of an action log, memory-mapped.
+
+    A log is a JSON header followed by fixed-size records, see record_dtype.
+    The header holds the episode length, action dtype, microgrid parameters,
+    dataset fingerprint and ENV_VERSION of the environment that recorded it.
+
+    Attributes:
+        header
+        offset
+        records
+    """
+
+    header: Dict[str, Any]
+    offset: int
+    records: np.ndarray
+
+    def __init__(self, path: str) -> None:
+        """Opening a log.
+
+        Args:
+            path
+        """
+        with open(path, "rb") as file:
+            self.header, self.offset = _read_header(file)
+
+        dtype = record_dtype(self.header["steps"], self.header["dtype"])
+        count = (getsize(path) - self.offset) // dtype.itemsize
+
+        # Trailing bytes of an interrupted write are ignored
+        if count == 0:
+            self.records = np.zeros(0, dtype=dtype)
+        else:
+            self.records = np.memmap(
+                path, dtype=dtype, mode="r", offset=self.offset, shape=(count,)
+            )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def parameters(self) -> MicrogridParameters:
+        return MicrogridParameters(**self.header["parameters"])
+
+    def start_time(self, index: int) -> datetime:
+        """Returns the start time of a recorded episode."""
+        return (
+            datetime(1970, 1, 1)
+            + int(self.records["start_hour"][index]) * TIME_RESOLUTION
+        )
+
+
+class EpisodeRecorder:
+    """Environment wrapper appending every completed episode to an action log.
+
+    Only the start time, initial state, requested actions and cumulative
+    reward are stored, about 8 bytes per step in float32. Episodes that are
+    reset before they end are not recorded. Appending to an existing log
+    requires an environment with the same episode length, dtype, parameters
+    and data.
+
+    Attributes:
+        env
+        path
+        _file
+        _record
+        _step
+    """
+
+    env: RyeEnv
+    path: str
+
+    _file: BinaryIO
+    _record: np.ndarray
+    _step: int
+
+    def __init__(self, env: RyeEnv, path: str) -> None:
+        """Initializing the recorder.
+
+        Args:
+            env
+            path: action log, created if it does not exist
+        """
+        self.env = env
+        self.path = path
+
+        header = {
+            "version": ENV_VERSION,
+            "steps": int(env._episode_length / env._time_resolution),
+            "dtype": env._dtype.str,
+            "parameters": asdict(MicrogridParameters.from_env(env)),
+            "data": env._data.fingerprint,
+        }
+
+        if exists(path) and getsize(path) > 0:
+            with open(path, "rb") as file:
+                existing, _ = _read_header(file)
+
+            if existing != header:
+                raise ValueError(f"{path} was recorded with another environment.")
+
+            # Drop a partial record left by an interrupted write
+            log = ActionLog(path)
+            with open(path, "r+b") as file:
+                file.truncate(log.offset + log.records.nbytes)
+            del log
+        else:
+            with open(path, "wb") as file:
+                _write_header(file, header)
+
+        self._file = open(path, "ab")
+        self._record = np.zeros(1, dtype=record_dtype(header["steps"], env._dtype))
+        self._step = -1
+
+    def reset(self, **kwargs: Any) -> np.ndarray:
+        """Resets the environment and starts recording an episode."""
+        if self.env._scenarios is not None:
+            raise ValueError("Episodes drawn from random scenarios cannot be replayed.")
+
+        observation = self.env.reset(**kwargs)
+        self._begin()
+
+        return observation
+
+    def _begin(self) -> None:
+        state = self.env._state
+
+        self._record["start_hour"] = np.datetime64(
+            self.env._episode_start_time, "h"
+        ).astype(np.int64)
+        self._record["battery_storage"] = state.battery_storage
+        self._record["hydrogen_storage"] = state.hydrogen_storage
+        self._record["grid_import"] = state.grid_import_peak
+        self._step = 0
+
+    def step(self, action: np.ndarray, out: Optional[np.ndarray] = None) -> Tuple:
+        """Steps the environment, writing the episode to the log when it ends."""
+        if self._step >= 0:
+            self._record["actions"][0, self._step] = action
+            self._step += 1
+
+        observation, reward, done, info = self.env.step(action, out=out)
+
+        if done:
+            if self._step >= 0:
+                self._record["cost"] = info.info["cumulative_reward"]
+                self._file.write(self._record.tobytes())
+                self._file.flush()
+
+            # RyeEnv starts the next episode by itself
+            self._begin()
+
+        return observation, reward, done, info
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "EpisodeRecorder":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+@dataclass(frozen=True)
+class ReplayReport:
+    """Recorded and replayed costs of the episodes of an action log.
+
+    Args:
+        recorded_cost: (N,) cumulative reward logged by the recorder
+        replayed_cost: (N,) cost of the same actions under rldiff.dynamics
+        tolerance: relative difference above which an episode diverges
+        seconds: time spent replaying
+        recorded_version: ENV_VERSION of the environment that recorded the log
+        replayed_version: ENV_VERSION of the dynamics used for the replay
+    """
+
+    recorded_cost: np.ndarray
+    replayed_cost: np.ndarray
+    tolerance: float
+    seconds: float
+    recorded_version: str
+    replayed_version: str
+
+    @property
+    def version_changed(self) -> bool:
+        """Divergences may come from an intended change of the dynamics."""
+        return self.recorded_version != self.replayed_version
+
+    @property
+    def difference(self) -> np.ndarray:
+        return np.abs(self.replayed_cost - self.recorded_cost) / np.maximum(
+            np.abs(self.recorded_cost), 1.0
+        )
+
+    @property
+    def divergent(self) -> np.ndarray:
+        """Indices of the episodes whose replay does not match the log."""
+        return np.flatnonzero(~(self.difference <= self.tolerance))
+
+    @property
+    def episodes_per_second(self) -> float:
+        return len(self.recorded_cost) / max(self.seconds, 1e-12)
+
+
+def replay(
+    log: ActionLog,
+    data: PreprocessedData,
+    parameters: Optional[MicrogridParameters] = None,
+    batch_size: int = 4096,
+    tolerance: Optional[float] = None,
+) -> ReplayReport:
+    """Re-simulate logged episodes in batches and compare their costs.
+
+    Logs of other ENV_VERSIONs are replayed with the current dynamics, the
+    report carries both versions to tell regressions from intended changes.
+
+    Args:
+        log
+        data: the data the episodes were recorded on
+        parameters: defaults to the parameters stored in the log
+        batch_size: episodes simulated per array operation
+        tolerance: defaults to the square root of the machine epsilon of the
+            logged dtype, as the environment accumulates rewards step by step
+
+    Returns:
+        report
+    """
+    dtype = np.dtype(log.header["dtype"])
+    steps = log.header["steps"]
+    data = data.astype(dtype)
+
+    if data.fingerprint != log.header["data"]:
+        raise ValueError("Data differs from the data the log was recorded on.")
+
+    if parameters is None:
+        parameters = log.parameters
+
+    if tolerance is None:
+        tolerance = float(np.sqrt(np.finfo(dtype).eps))
+
+    origin = np.datetime64(data.start_time, "h").astype(np.int64)
+    offsets = np.arange(1, steps + 1)
+    replayed = np.empty(len(log), dtype=np.float64)
+
+    begin = time.perf_counter()
+
+    for start in range(0, len(log), batch_size):
+        records = log.records[start : start + batch_size]
+        rows = records["start_hour"] - origin
+
+        if len(rows) and (rows.min() < 0 or rows.max() + steps >= len(data.values)):
+            raise ValueError("Logged episodes are outside of the data.")
+
+        cost, peak, _, _ = rollout(
+            parameters,
+            records["battery_storage"].astype(dtype),
+            records["hydrogen_storage"].astype(dtype),
+            records["grid_import"].astype(dtype),
+            np.asarray(records["actions"], dtype=dtype),
+            data.values[rows[:, None] + offsets],
+        )
+        replayed[start : start + len(records)] = (
+            cost + parameters.peak_grid_tarrif * peak
+        )
+
+    return ReplayReport(
+        recorded_cost=np.asarray(log.records["cost"], dtype=np.float64),
+        replayed_cost=replayed,
+        tolerance=tolerance,
+        seconds=time.perf_counter() - begin,
+        recorded_version=log.header["version"],
+        replayed_version=ENV_VERSION,
+    )
@@ -0,0 +1,297 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from os.path import exists, join
+from rldiff.preprocessing import COLUMNS, PreprocessedData
+from rldiff.diffusion import MLPDenoiser, NoiseSchedule, ddim_sample
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ScenarioGenerator:
+    """Diffusion model over episode-length windows of the exogenous series.
+
+    Windows of consumption, wind, photovoltaic production and spot price are
+    standardized, flattened and projected onto their leading principal
+    components. The diffusion model is trained in that latent space, which keeps
+    the denoiser small enough to sample thousands of scenarios on CPU.
+
+    Attributes:
+        length
+        components
+        schedule
+        denoiser
+        _config
+        _mean
+        _std
+        _basis
+        _latent_std
+        _minimum
+        _maximum
+    """
+
+    length: int
+    components: int
+    schedule: NoiseSchedule
+    denoiser: MLPDenoiser
+
+    _config: Dict[str, Any]
+    _mean: np.ndarray
+    _std: np.ndarray
+    _basis: np.ndarray
+    _latent_std: np.ndarray
+    _minimum: np.ndarray
+    _maximum: np.ndarray
+
+    def __init__(
+        self,
+        length: int,
+        components: int = 64,
+        hidden_size: int = 256,
+        diffusion_steps: int = 1000,
+        random_seed: Optional[int] = None,
+    ) -> None:
+        """Initializing the scenario generator.
+
+        Args:
+            length: number of hours in a scenario
+            components: size of the principal component latent space
+            hidden_size: width of the denoiser
+            diffusion_steps: number of steps in the noise schedule
+            random_seed
+        """
+        self._config = {
+            "length": length,
+            "components": components,
+            "hidden_size": hidden_size,
+            "diffusion_steps": diffusion_steps,
+            "random_seed": random_seed,
+        }
+        self.length = length
+        self.components = components
+        self.schedule = NoiseSchedule(diffusion_steps)
+        self.denoiser = MLPDenoiser(
+            components, hidden_size=hidden_size, random_seed=random_seed
+        )
+
+    def windows(self, data: PreprocessedData, stride: int = 24) -> np.ndarray:
+        """Returns (N, length, 4) windows of the data taken every `stride` hours."""
+        starts = np.arange(0, len(data.values) - self.length + 1, stride)
+
+        return np.stack([data.values[start : start + self.length] for start in starts])
+
+    def fit(
+        self,
+        data: PreprocessedData,
+        epochs: int = 2000,
+        batch_size: int = 128,
+        learning_rate: float = 1e-3,
+        stride: int = 24,
+    ) -> List[float]:
+        """
+        Train the generator on windows of the data.
+
+        Args:
+            data
+            epochs: number of minibatch updates
+            batch_size
+            learning_rate
+            stride: hours between the starts of training windows
+
+        Returns:
+            losses: training loss per update
+        """
+        rng = np.random.default_rng(self._config["random_seed"])
+        windows = self.windows(data, stride)
+
+        if len(windows) < self.components:
+            raise ValueError(
+                f"{len(windows)} training windows are fewer than "
+                f"{self.components} components."
+            )
+
+        # Per column standardization
+        self._mean = data.values.mean(axis=0)
+        self._std = data.values.std(axis=0) + 1e-8
+        self._minimum = data.minimum.copy()
+        self._maximum = data.maximum.copy()
+
+        flat = ((windows - self._mean) / self._std).reshape(len(windows), -1)
+
+        # Principal component latent space with unit variance per component
+        _, _, vt = np.linalg.svd(flat, full_matrices=False)
+        self._basis = vt[: self.components]
+        latent = flat @ self._basis.T
+        self._latent_std = latent.std(axis=0) + 1e-8
+        latent = (latent / self._latent_std).astype(np.float32)
+
+        losses = []
+        for _ in range(epochs):
+            batch = latent[rng.integers(0, len(latent), batch_size)]
+            losses.append(
+                self.denoiser.train_step(batch, self.schedule, rng, None, learning_rate)
+            )
+
+        return losses
+
+    def decode(self, latent: np.ndarray) -> np.ndarray:
+        """Map latent samples back to (N, length, 4) scenarios in data units."""
+        flat = (latent * self._latent_std) @ self._basis
+        scenarios = flat.reshape(len(latent), self.length, len(COLUMNS))
+        scenarios = scenarios * self._std + self._mean
+
+        return np.clip(scenarios, self._minimum, self._maximum).astype(np.float32)
+
+    def sample(
+        self,
+        n: int,
+        steps: int = 50,
+        random_seed: Optional[int] = None,
+        batch_size: int = 1024,
+    ) -> np.ndarray:
+        """Sample scenarios with batched DDIM denoising passes.
+
+        Args:
+            n: number of scenarios
+            steps: number of denoising passes
+            random_seed
+            batch_size: scenarios denoised together
+
+        Returns:
+            scenarios: (n, length, 4) float32 array
+        """
+        return np.concatenate(
+            list(self.iterate_samples(n, steps, random_seed, batch_size))
+        )
+
+    def iterate_samples(
+        self,
+        n: int,
+        steps: int = 50,
+        random_seed: Optional[int] = None,
+        batch_size: int = 1024,
+    ) -> Iterator[np.ndarray]:
+        """Yield scenario batches of at most batch_size, see sample."""
+        rng = np.random.default_rng(random_seed)
+        encoded = self.denoiser.encode_condition()
+
+        for start in range(0, n, batch_size):
+            noise = rng.standard_normal(
+                (min(batch_size, n - start), self.components)
+            ).astype(np.float32)
+
+            yield self.decode(
+                ddim_sample(self.denoiser, self.schedule, noise, steps, encoded)
+            )
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the configuration and trained parameters."""
+        digest = hashlib.sha256(json.dumps(self._config, sort_keys=True).encode())
+
+        for name, value in sorted(self._arrays().items()):
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+
+        return digest.hexdigest()
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            "mean": self._mean,
+            "std": self._std,
+            "basis": self._basis,
+            "latent_std": self._latent_std,
+            "minimum": self._minimum,
+            "maximum": self._maximum,
+        }
+        arrays.update(
+            {f"parameter_{k}": v for k, v in self.denoiser.parameters.items()}
+        )
+
+        return arrays
+
+    def save(self, path: str) -> None:
+        """Store the trained generator as an .npz archive."""
+        np.savez(path, config=json.dumps(self._config), **self._arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "ScenarioGenerator":
+        with np.load(path) as archive:
+            generator = cls(**json.loads(str(archive["config"])))
+
+            for name in ("mean", "std", "basis", "latent_std", "minimum", "maximum"):
+                setattr(generator, f"_{name}", archive[name])
+
+            for name in generator.denoiser.parameters:
+                generator.denoiser.parameters[name] = archive[f"parameter_{name}"]
+
+        return generator
+
+
+class ScenarioCache:
+    """On-disk cache of generated scenario tensors.
+
+    Each entry is a .npy file keyed by generator fingerprint, seed, number of
+    scenarios and denoising steps, and is returned memory-mapped so environments
+    can draw episodes from it without loading it into memory.
+
+    Attributes:
+        _directory
+    """
+
+    _directory: str
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    def path(
+        self, generator: ScenarioGenerator, n: int, random_seed: int, steps: int
+    ) -> str:
+        """Returns the file of a cache entry."""
+        name = f"{generator.fingerprint[:16]}-seed{random_seed}-n{n}-steps{steps}.npy"
+
+        return join(self._directory, name)
+
+    def get(
+        self,
+        generator: ScenarioGenerator,
+        n: int,
+        random_seed: int = 0,
+        steps: int = 50,
+        batch_size: int = 1024,
+    ) -> np.ndarray:
+        """Returns cached scenarios, generating and storing them if missing.
+
+        Args:
+            generator: trained scenario generator
+            n: number of scenarios
+            random_seed
+            steps: number of denoising passes
+            batch_size: scenarios denoised and written together
+
+        Returns:
+            scenarios: read-only memory-mapped (n, length, 4) float32 array
+        """
+        path = self.path(generator, n, random_seed, steps)
+
+        if not exists(path):
+            partial = f"{path}.{os.getpid()}.partial"
+            scenarios = np.lib.format.open_memmap(
+                partial,
+                mode="w+",
+                dtype=np.float32,
+                shape=(n, generator.length, len(COLUMNS)),
+            )
+
+            start = 0
+            for batch in generator.iterate_samples(n, steps, random_seed, batch_size):
+                scenarios[start : start + len(batch)] = batch
+                start += len(batch)
+
+            scenarios.flush()
+            del scenarios
+            os.replace(partial, path)
+
+        return np.load(path, mmap_mode="r")
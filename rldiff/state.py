@@ -1,6 +1,8 @@
 import numpy as np
 
 from dataclasses import dataclass
+from typing import Optional
+from numpy.typing import DTypeLike
 
 
 @dataclass
@@ -29,19 +31,27 @@ class State:
 
     @property
     def vector(self) -> np.ndarray:
-        return np.array(
-            [
-                self.consumption,
-                self.wind_production,
-                self.photovoltaic_production,
-                self.battery_storage,
-                self.hydrogen_storage,
-                self.grid_import,
-                self.grid_import_peak,
-                self.spot_market_price,
-            ],
-            dtype=np.float64,
-        )
+        return self.to_vector()
+
+    def to_vector(
+        self, dtype: DTypeLike = np.float64, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        values = [
+            self.consumption,
+            self.wind_production,
+            self.photovoltaic_production,
+            self.battery_storage,
+            self.hydrogen_storage,
+            self.grid_import,
+            self.grid_import_peak,
+            self.spot_market_price,
+        ]
+
+        if out is None:
+            return np.array(values, dtype=dtype)
+
+        out[:] = values
+        return out
 
     @classmethod
     def from_vector(cls, state: np.ndarray) -> "State":
@@ -1,6 +1,10 @@
-import pandas as pd
+from __future__ import annotations
 
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # Datetime Functions
@@ -10,5 +14,7 @@ def get_hour_resolution(date: datetime) -> datetime:
 
 # Data Processing Functions
 def preprocess(data: pd.DataFrame):
-    """Update data to fit datetime index format"""
-    return data.set_index(pd.DatetimeIndex(data.time))
+    """Update data to fit datetime index format on a dense hourly grid"""
+    from rldiff.preprocessing import preprocess_data
+
+    return preprocess_data(data).frame
@@ -1,18 +1,19 @@
-import ray
+import pandas as pd
 
 from datetime import datetime
 from os.path import abspath, dirname, join
 
 from rldiff.env import RyeEnv
+from rldiff.agent import RandomActionAgent
 from rldiff.plotter import RyeEnvironmentEpisodePlotter
 from rldiff.type_models import InfoDictionary
-from scripts.python.random_action import RandomActionAgent
 
 
 def main() -> None:
-    data = ray.data.read_csv(
-        join(dirname(abspath(join(__file__, "../../"))), "data/rye/test.csv")
-    ).to_pandas()
+    data = pd.read_csv(
+        join(dirname(abspath(join(__file__, "../../"))), "data/rye/test.csv"),
+        parse_dates=["time"],
+    )
 
     env = RyeEnv(data)
     agent = RandomActionAgent(action_space=env.action_space)
@@ -24,7 +25,7 @@ def main() -> None:
     done = False
 
     while not done:
-        action = agent.get_action(state)
+        action = agent.act(state[None])[0]
 
         state, reward, done, info = env.step(action)
 
@@ -0,0 +1,115 @@
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from os.path import abspath, dirname, join
+from typing import Dict, List, Optional, Union
+
+# Only the standard library is imported at module level: the measurements below
+# are taken in a fresh interpreter and must include every heavy dependency.
+
+COLD_START_BUDGET_SECONDS = 5.0
+HEAVY_MODULES = ("pandas", "pydantic", "matplotlib", "ray")
+
+ROOT_DIRECTORY = dirname(abspath(join(__file__, "../../")))
+
+
+def _worker(data_path: Optional[str]) -> Dict[str, Union[float, List[str]]]:
+    """Measure cold start of a rollout worker inside the current interpreter."""
+    start = time.perf_counter()
+
+    import numpy as np
+    from rldiff.env import RyeEnv
+
+    imported = time.perf_counter()
+    loaded_on_import = [module for module in HEAVY_MODULES if module in sys.modules]
+
+    import pandas as pd
+
+    if data_path is None:
+        data = pd.DataFrame(
+            {
+                "time": pd.date_range("2020-01-01", periods=24 * 60, freq="h"),
+                "consumption": 1.0,
+                "wind_production": 1.0,
+                "photovoltaic_production": 1.0,
+                "spot_market_price": 1.0,
+            }
+        )
+    else:
+        data = pd.read_csv(data_path, parse_dates=["time"])
+
+    data_loaded = time.perf_counter()
+
+    env = RyeEnv(data, random_seed=0)
+
+    constructed = time.perf_counter()
+
+    env.step(np.zeros(2))
+
+    stepped = time.perf_counter()
+
+    return {
+        "import_seconds": imported - start,
+        "data_seconds": data_loaded - imported,
+        "construct_seconds": constructed - data_loaded,
+        "first_step_seconds": stepped - constructed,
+        "cold_start_seconds": stepped - start,
+        "loaded_on_import": loaded_on_import,
+    }
+
+
+def measure_cold_start(
+    data_path: Optional[str] = None,
+) -> Dict[str, Union[float, List[str]]]:
+    """
+    Spawn a fresh interpreter and time import, construction and the first step.
+
+    Args:
+        data_path: CSV file to build the environment from, synthetic if None.
+
+    Returns:
+        timings: seconds spent in each phase and heavy modules loaded on import.
+    """
+    command = [sys.executable, "-m", "scripts.python.startup_benchmark", "--worker"]
+
+    if data_path is not None:
+        command += ["--data", data_path]
+
+    started = time.perf_counter()
+    output = subprocess.run(
+        command, cwd=ROOT_DIRECTORY, capture_output=True, check=True, text=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_seconds"] = time.perf_counter() - started
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rollout worker cold start.")
+    parser.add_argument("--data", default=None, help="CSV with Rye data.")
+    parser.add_argument("--budget", type=float, default=COLD_START_BUDGET_SECONDS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        print(json.dumps(_worker(arguments.data)))
+        return
+
+    timings = measure_cold_start(arguments.data)
+
+    for name, value in timings.items():
+        print(f"{name}: {value}")
+
+    if timings["cold_start_seconds"] > arguments.budget:
+        sys.exit(
+            f"Cold start {timings['cold_start_seconds']:.3f}s exceeds "
+            f"budget of {arguments.budget:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
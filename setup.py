@@ -21,6 +21,9 @@ setup(
     zip_safe=False,
     packages=find_packages("rldiff"),
     install_requires=["gymnasium", "matplotlib", "pandas"],
-    extra_require={"dev": ["black", "pytest", "isort", "tox-conda"]},
+    extra_require={
+        "dev": ["black", "pytest", "isort", "tox-conda"],
+        "dataset": ["pyarrow"],
+    },
     python_requires=">3.8",
 )
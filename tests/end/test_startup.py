@@ -0,0 +1,28 @@
+from typing import Dict, List, Union
+import pytest
+
+from scripts.python.startup_benchmark import (
+    COLD_START_BUDGET_SECONDS,
+    measure_cold_start,
+)
+
+
+@pytest.fixture(scope="module")
+def context() -> Dict[str, Union[float, List[str]]]:
+    return measure_cold_start()
+
+
+class TestStartup:
+    """
+    Class testing cold start of a fresh rollout worker.
+    """
+
+    def test_no_heavy_imports(
+        self, context: Dict[str, Union[float, List[str]]]
+    ) -> None:
+        assert context["loaded_on_import"] == []
+
+    def test_cold_start_budget(
+        self, context: Dict[str, Union[float, List[str]]]
+    ) -> None:
+        assert context["cold_start_seconds"] < COLD_START_BUDGET_SECONDS
@@ -0,0 +1,36 @@
+from typing import Callable, Tuple, Union
+import numpy as np
+import pytest
+import pandas as pd
+
+
+def make_synthetic_frame(
+    periods: int,
+    price_range: Tuple[float, float] = (0.1, 2.0),
+    random_seed: Union[int, np.random.Generator] = 0,
+    start: str = "2020-1-1",
+) -> pd.DataFrame:
+    """Hourly data with uniformly drawn consumption, production and prices.
+
+    Args:
+        periods: number of hours
+        price_range: low and high of the spot market price
+        random_seed: seed, or a Generator to keep drawing from
+        start: first hour
+    """
+    rng = np.random.default_rng(random_seed)
+
+    return pd.DataFrame(
+        data={
+            "consumption": rng.uniform(100, 400, periods),
+            "wind_production": rng.uniform(0, 200, periods),
+            "photovoltaic_production": rng.uniform(0, 100, periods),
+            "spot_market_price": rng.uniform(*price_range, periods),
+        },
+        index=pd.date_range(start, periods=periods, freq="h"),
+    )
+
+
+@pytest.fixture(scope="session")
+def synthetic_frame() -> Callable[..., pd.DataFrame]:
+    return make_synthetic_frame
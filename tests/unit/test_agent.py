@@ -0,0 +1,54 @@
+from typing import Dict, Any
+import numpy as np
+import pytest
+import gymnasium as gym
+
+from rldiff.agent import Agent, RandomActionAgent
+
+
+@pytest.fixture
+def context() -> Dict[str, Any]:
+    action_space = gym.spaces.Box(
+        low=np.array([-400.0, -100.0]), high=np.array([400.0, 55.0]), dtype=np.float64
+    )
+
+    return {
+        "action_space": action_space,
+        "agent": RandomActionAgent(action_space, random_seed=0, stream_length=10),
+        "observations": np.zeros((4, 8)),
+    }
+
+
+class TestAgent:
+    """
+    Class testing the agent protocol and random action agent.
+    """
+
+    def test_protocol(self, context: Dict[str, Any]) -> None:
+        assert isinstance(context["agent"], Agent)
+
+    def test_act_shape(self, context: Dict[str, Any]) -> None:
+        assert context["agent"].act(context["observations"]).shape == (4, 2)
+
+    def test_act_in_action_space(self, context: Dict[str, Any]) -> None:
+        actions = context["agent"].act(np.zeros((25, 8)))
+
+        assert all(context["action_space"].contains(action) for action in actions)
+
+    def test_stream_is_consumed(self, context: Dict[str, Any]) -> None:
+        first = context["agent"].act(context["observations"])
+        second = context["agent"].act(context["observations"])
+
+        assert not np.array_equal(first, second)
+
+    def test_sample_episodes_shape(self, context: Dict[str, Any]) -> None:
+        assert context["agent"].sample_episodes(48, 3).shape == (3, 48, 2)
+
+    def test_seeded(self, context: Dict[str, Any]) -> None:
+        first = RandomActionAgent(context["action_space"], random_seed=0)
+        second = RandomActionAgent(context["action_space"], random_seed=0)
+
+        assert np.array_equal(first.sample_episodes(5), second.sample_episodes(5))
+
+    def test_get_action(self, context: Dict[str, Any]) -> None:
+        assert context["agent"].get_action().shape == (2,)
@@ -0,0 +1,124 @@
+from typing import Any, Callable, Dict
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+from functools import partial
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.agent import RandomActionAgent
+from rldiff.dataset import OfflineDataset, generate_dataset
+from rldiff.preprocessing import preprocess_data
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def context(tmp_path, synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    data = preprocess_data(synthetic_frame(24 * 10))
+    action_space = RyeEnv(data, timedelta(days=1)).action_space
+    start_times = [datetime(2020, 1, day) for day in range(1, 6)]
+
+    return {
+        "data": data,
+        "policies": {"random": partial(RandomActionAgent, action_space)},
+        "start_times": start_times,
+        "directory": str(tmp_path),
+    }
+
+
+def generate(context: Dict[str, Any], **options: Any) -> Dict[str, Any]:
+    return generate_dataset(
+        context["data"],
+        context["policies"],
+        context["start_times"],
+        context["directory"],
+        episode_length=timedelta(days=1),
+        chunk_rows=50,
+        **options,
+    )
+
+
+class TestDataset:
+    """
+    Class testing offline dataset generation and loading.
+    """
+
+    def test_manifest(self, context: Dict[str, Any]) -> None:
+        manifest = generate(context)
+
+        assert manifest["episodes"] == 5
+        assert manifest["rows"] == 5 * 24
+        assert sum(shard["rows"] for shard in manifest["shards"]) == 5 * 24
+
+    def test_shard_size_bound(self, context: Dict[str, Any]) -> None:
+        manifest = generate(context, shard_bytes=4096)
+
+        assert len(manifest["shards"]) > 1
+
+    def test_parallel_workers(self, context: Dict[str, Any]) -> None:
+        manifest = generate(context, workers=2)
+        episodes = OfflineDataset(context["directory"]).iterate(1000, shuffle=False)
+
+        assert manifest["rows"] == 5 * 24
+        assert sorted(set(next(episodes)["episode_id"])) == list(range(5))
+
+    @pytest.mark.parametrize("format", ["parquet", "arrow"])
+    def test_minibatches(self, context: Dict[str, Any], format: str) -> None:
+        generate(context, format=format)
+        dataset = OfflineDataset(context["directory"])
+        batches = list(dataset.iterate(32, random_seed=0, buffer_rows=64))
+
+        assert len(dataset) == 5 * 24
+        assert sum(len(batch["reward"]) for batch in batches) == 5 * 24
+        assert batches[0]["observation"].shape == (32, 8)
+        assert batches[0]["action"].shape == (32, 2)
+        assert batches[0]["observation"].dtype == np.float32
+
+    def test_terminals(self, context: Dict[str, Any]) -> None:
+        generate(context)
+        batch = next(OfflineDataset(context["directory"]).iterate(1000, shuffle=False))
+
+        assert batch["terminal"].sum() == 5
+        assert batch["terminal"][23]
+
+    def test_rewards_match_env(self, context: Dict[str, Any]) -> None:
+        generate(context, dtype=np.float64)
+        batch = next(OfflineDataset(context["directory"]).iterate(1000, shuffle=False))
+
+        env = RyeEnv(context["data"], timedelta(days=1))
+        env.reset(start_time=context["start_times"][0])
+        rewards = [env.step(action)[1] for action in batch["action"][:24]]
+
+        assert np.allclose(rewards, batch["reward"][:24])
+
+    @pytest.mark.parametrize("format", ["parquet", "arrow"])
+    def test_shards_are_opened_lazily(
+        self, context: Dict[str, Any], format: str
+    ) -> None:
+        manifest = generate(context, format=format, shard_bytes=4096)
+        dataset = OfflineDataset(context["directory"])
+        reference = next(dataset.iterate(1000, shuffle=False))
+
+        # Manifests without chunk counts fall back to shard metadata
+        for shard in dataset.manifest["shards"]:
+            del shard["chunks"]
+
+        def open_shards() -> int:
+            return sum(
+                os.readlink(f"/proc/self/fd/{fd}").startswith(context["directory"])
+                for fd in os.listdir("/proc/self/fd")
+                if os.path.exists(f"/proc/self/fd/{fd}")
+            )
+
+        batches = dataset.iterate(16, random_seed=0, buffer_rows=16)
+        counts = [open_shards() for _ in batches]
+
+        assert len(manifest["shards"]) > 1
+        assert max(counts) == 0
+        assert np.array_equal(
+            reference["reward"],
+            next(dataset.iterate(1000, shuffle=False))["reward"],
+        )
@@ -0,0 +1,72 @@
+from typing import Dict, Any
+import numpy as np
+import pytest
+
+from rldiff.diffusion import MLPDenoiser, NoiseSchedule, ddim_sample
+
+
+@pytest.fixture
+def context() -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+
+    return {
+        "schedule": NoiseSchedule(100),
+        "denoiser": MLPDenoiser(
+            5, condition_size=3, hidden_size=16, random_seed=0, dtype=np.float64
+        ),
+        "x": rng.normal(size=(7, 5)),
+        "condition": rng.normal(size=(7, 3)),
+    }
+
+
+class TestDiffusion:
+    """
+    Class testing the numpy diffusion primitives.
+    """
+
+    def test_ddim_timesteps(self, context: Dict[str, Any]) -> None:
+        timesteps = context["schedule"].ddim_timesteps(10)
+
+        assert len(timesteps) == 10
+        assert timesteps[0] == 99 and timesteps[-1] == 0
+
+    def test_gradients(self, context: Dict[str, Any]) -> None:
+        denoiser = context["denoiser"]
+        gradients = {}
+        denoiser._adam = lambda grads, learning_rate: gradients.update(grads)
+
+        def loss() -> float:
+            return denoiser.train_step(
+                context["x"],
+                context["schedule"],
+                np.random.default_rng(1),
+                context["condition"],
+            )
+
+        loss()
+
+        for name in ("input", "condition", "time", "hidden", "output", "bias_1"):
+            parameter = denoiser.parameters[name]
+            index = (0,) * parameter.ndim
+            value = parameter[index]
+
+            parameter[index] = value + 1e-6
+            upper = loss()
+            parameter[index] = value - 1e-6
+            lower = loss()
+            parameter[index] = value
+
+            assert np.isclose((upper - lower) / 2e-6, gradients[name][index], rtol=1e-4)
+
+    def test_condition_encoding_reused(self, context: Dict[str, Any]) -> None:
+        denoiser = context["denoiser"]
+        encoded = denoiser.encode_condition(context["condition"])
+        noise = np.random.default_rng(2).normal(size=(7, 5))
+
+        samples = ddim_sample(denoiser, context["schedule"], noise, 5, encoded)
+
+        assert samples.shape == (7, 5)
+        assert np.allclose(
+            denoiser.predict(noise, 50, encoded),
+            denoiser.predict(noise, np.full(7, 50), encoded),
+        )
@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict
+from functools import partial
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.episode_index import EpisodeWindowIndex
+from rldiff.preprocessing import preprocess_data
+
+
+@pytest.fixture
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    data = preprocess_data(synthetic_frame(24 * 400, price_range=(-0.5, 2.0)))
+    episode_length = timedelta(days=7)
+
+    return {
+        "data": data,
+        "episode_length": episode_length,
+        "index": EpisodeWindowIndex(data, episode_length),
+    }
+
+
+class TestEpisodeWindowIndex:
+    def test_candidates(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+        data = context["data"]
+
+        assert index.time_of(0) == data.start_time
+        assert index.time_of(len(index) - 1) + context["episode_length"] == (
+            data.end_time
+        )
+
+    def test_statistics_match_windows(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+        values = context["data"].values
+        length = 24 * 7
+
+        for start in (0, 1000, len(index) - 1):
+            window = values[start + 1 : start + 1 + length]
+            renewable = window[:, 1] + window[:, 2]
+
+            assert index.statistics["net_load"][start] == pytest.approx(
+                np.mean(window[:, 0] - renewable)
+            )
+            assert index.statistics["price_volatility"][start] == pytest.approx(
+                np.std(window[:, 3]), rel=1e-6
+            )
+            assert index.statistics["renewable_share"][start] == pytest.approx(
+                renewable.sum() / window[:, 0].sum()
+            )
+
+    def test_seasons(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+
+        assert index.season_of(index.time_of(0)) == "winter"
+        assert index.season_of(index.time_of(24 * 182)) == "summer"
+        assert index.season_of(index.time_of(len(index))) is None
+
+    def test_stratified_sampling_is_balanced(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+        rng = np.random.default_rng(0)
+
+        seasons = [index.season_of(index.sample_stratified(rng)) for _ in range(4000)]
+        counts = pd.Series(seasons).value_counts()
+
+        assert len(counts) == 4
+        assert counts.min() > 900
+
+        strata = index.strata("price_volatility", bins=5)
+        assert len(strata) == 5
+        assert sum(len(stratum) for stratum in strata) == len(index)
+
+    def test_curriculum(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+        rng = np.random.default_rng(0)
+        difficulty = index.statistics["difficulty"]
+
+        easiest = index.sample_curriculum(rng, progress=0.0)
+        assert easiest == index.time_of(np.argmin(difficulty))
+
+        threshold = np.sort(difficulty)[int(np.ceil(0.1 * len(index))) - 1]
+        for _ in range(100):
+            start = index.sample_curriculum(rng, progress=0.1)
+            row = (start - index.start_time) // timedelta(hours=1)
+            assert difficulty[row] <= threshold
+
+    def test_env_start_sampler(self, context: Dict[str, Any]) -> None:
+        index = context["index"]
+        rng = np.random.default_rng(0)
+        env = RyeEnv(
+            data=context["data"],
+            episode_length=context["episode_length"],
+            start_sampler=partial(index.sample_curriculum, rng, 0.0),
+        )
+
+        env.reset()
+        assert env._time == index.time_of(np.argmin(index.statistics["difficulty"]))
+
+    def test_short_data(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(ValueError):
+            EpisodeWindowIndex(context["data"], timedelta(days=400))
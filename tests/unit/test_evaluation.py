@@ -0,0 +1,165 @@
+from typing import Any, Callable, Dict
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+import rldiff.evaluation
+from rldiff.env import RyeEnv
+from rldiff.preprocessing import preprocess_data
+from rldiff.evaluation import EvaluationCache, evaluate_policy
+
+
+class ConstantAgent:
+    def __init__(self, action: np.ndarray) -> None:
+        self.action = np.asarray(action, dtype=np.float64)
+        self.calls = 0
+
+    def act(self, observations: np.ndarray) -> np.ndarray:
+        self.calls += 1
+        return np.tile(self.action, (len(observations), 1))
+
+    def fingerprint(self) -> str:
+        return f"constant-{self.action.tolist()}"
+
+
+@pytest.fixture
+def context(tmp_path, synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    data = synthetic_frame(24 * 10)
+
+    return {
+        "data": data,
+        "env": RyeEnv(preprocess_data(data), timedelta(days=2)),
+        "agent": ConstantAgent([50.0, -10.0]),
+        "start_time": datetime(2020, 1, 3),
+        "directory": str(tmp_path),
+    }
+
+
+class TestEvaluation:
+    """
+    Class testing memoized policy evaluation.
+    """
+
+    def test_cost_breakdown(self, context: Dict[str, Any]) -> None:
+        cost = evaluate_policy(context["env"], context["agent"], context["start_time"])
+
+        assert cost.steps == 48
+        assert np.isclose(cost.energy_cost + cost.peak_cost, cost.total_cost)
+        assert np.isclose(cost.peak_cost, 49.0 * cost.grid_import_peak)
+
+    def test_memory_hit(self, context: Dict[str, Any]) -> None:
+        cache = EvaluationCache()
+        first = evaluate_policy(
+            context["env"], context["agent"], context["start_time"], cache=cache
+        )
+        calls = context["agent"].calls
+        second = evaluate_policy(
+            context["env"], context["agent"], context["start_time"], cache=cache
+        )
+
+        assert first == second
+        assert context["agent"].calls == calls
+
+    def test_key_depends_on_inputs(self, context: Dict[str, Any]) -> None:
+        env, agent = context["env"], context["agent"]
+        key = EvaluationCache.key(env, agent, context["start_time"])
+        other_data = preprocess_data(context["data"].assign(spot_market_price=1.0))
+
+        assert key != EvaluationCache.key(env, agent, context["start_time"], 100.0)
+        assert key != EvaluationCache.key(env, agent, datetime(2020, 1, 4))
+        assert key != EvaluationCache.key(
+            env, ConstantAgent([0.0, 0.0]), context["start_time"]
+        )
+        assert key != EvaluationCache.key(
+            RyeEnv(context["data"], timedelta(days=2), grid_tarrif=0.1),
+            agent,
+            context["start_time"],
+        )
+        assert key != EvaluationCache.key(
+            RyeEnv(other_data, timedelta(days=2)), agent, context["start_time"]
+        )
+
+    def test_disk_tier(self, context: Dict[str, Any]) -> None:
+        cost = evaluate_policy(
+            context["env"],
+            context["agent"],
+            context["start_time"],
+            cache=EvaluationCache(context["directory"]),
+        )
+        calls = context["agent"].calls
+
+        cached = evaluate_policy(
+            context["env"],
+            context["agent"],
+            context["start_time"],
+            cache=EvaluationCache(context["directory"]),
+        )
+
+        assert cached == cost
+        assert context["agent"].calls == calls
+
+    def test_memory_eviction(self, context: Dict[str, Any]) -> None:
+        cache = EvaluationCache(max_entries=2)
+
+        for day in (3, 4, 5):
+            evaluate_policy(
+                context["env"], context["agent"], datetime(2020, 1, day), cache=cache
+            )
+
+        key = cache.key(context["env"], context["agent"], datetime(2020, 1, 3))
+
+        assert cache.get(key) is None
+
+    def test_disk_eviction(self, context: Dict[str, Any]) -> None:
+        cache = EvaluationCache(context["directory"], max_entries=1, max_bytes=400)
+
+        for day in (3, 4, 5, 6):
+            evaluate_policy(
+                context["env"], context["agent"], datetime(2020, 1, day), cache=cache
+            )
+
+        assert 0 < cache._disk_bytes <= 400
+        assert cache.get(
+            cache.key(context["env"], context["agent"], datetime(2020, 1, 6))
+        )
+        assert (
+            cache.get(cache.key(context["env"], context["agent"], datetime(2020, 1, 3)))
+            is None
+        )
+
+    def test_version_invalidation(
+        self, context: Dict[str, Any], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        evaluate_policy(
+            context["env"],
+            context["agent"],
+            context["start_time"],
+            cache=EvaluationCache(context["directory"]),
+        )
+        monkeypatch.setattr(rldiff.evaluation, "ENV_VERSION", "2")
+        cache = EvaluationCache(context["directory"])
+
+        assert (
+            cache.get(
+                cache.key(context["env"], context["agent"], context["start_time"])
+            )
+            is None
+        )
+        assert cache._disk_bytes == 0
+        assert os.listdir(os.path.join(context["directory"], "evaluation-cache")) == [
+            "v2"
+        ]
+
+    def test_unrelated_directories_survive(self, context: Dict[str, Any]) -> None:
+        directory = context["directory"]
+        os.makedirs(os.path.join(directory, "important_results"))
+        os.makedirs(os.path.join(directory, "evaluation-cache", "notes"))
+
+        EvaluationCache(directory)
+
+        assert os.path.isdir(os.path.join(directory, "important_results"))
+        assert os.path.isdir(os.path.join(directory, "evaluation-cache", "notes"))
+        assert os.path.isdir(os.path.join(directory, "evaluation-cache", "v1"))
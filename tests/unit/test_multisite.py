@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.dynamics import MicrogridParameters
+from rldiff.multisite import MultiSiteRyeEnv
+from rldiff.preprocessing import preprocess_data
+
+
+@pytest.fixture
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    sites = [
+        preprocess_data(synthetic_frame(24 * 10, random_seed=seed)) for seed in range(3)
+    ]
+    env = MultiSiteRyeEnv(sites, timedelta(days=2))
+    actions = np.random.default_rng(0).uniform(
+        env.action_space.low, env.action_space.high, (48, 3, 2)
+    )
+
+    return {
+        "sites": sites,
+        "env": env,
+        "actions": actions,
+        "start_time": datetime(2020, 1, 3),
+    }
+
+
+def run_single_site(
+    site: Any, actions: np.ndarray, start_time: datetime
+) -> Dict[str, Any]:
+    env = RyeEnv(site, timedelta(days=2))
+    env.reset(start_time=start_time)
+    steps = [env.step(action) for action in actions]
+
+    return {
+        "rewards": np.array([step[1] for step in steps]),
+        "grid_import": np.array([step[3].info["state"].grid_import for step in steps]),
+        "peak": steps[-1][3].info["state"].grid_import_peak,
+    }
+
+
+class TestMultiSite:
+    """
+    Class testing the multi-site environment against single RyeEnv sites.
+    """
+
+    def test_spaces(self, context: Dict[str, Any]) -> None:
+        assert context["env"].observation_space.shape == (3, 8)
+        assert context["env"].action_space.shape == (3, 2)
+
+    def test_single_site_matches_rye(self, context: Dict[str, Any]) -> None:
+        env = MultiSiteRyeEnv(context["sites"][:1], timedelta(days=2))
+        env.reset(start_time=context["start_time"])
+        rewards = [env.step(action[:1])[1] for action in context["actions"]]
+
+        reference = run_single_site(
+            context["sites"][0], context["actions"][:, 0], context["start_time"]
+        )
+
+        assert np.allclose(rewards, reference["rewards"])
+
+    def test_sites_share_peak(self, context: Dict[str, Any]) -> None:
+        env = context["env"]
+        env.reset(start_time=context["start_time"])
+        steps = [env.step(action) for action in context["actions"]]
+
+        references = [
+            run_single_site(site, context["actions"][:, index], context["start_time"])
+            for index, site in enumerate(context["sites"])
+        ]
+        grid_import = np.stack([step[3]["grid_import"] for step in steps])
+        peak = grid_import.sum(axis=1).max()
+
+        assert np.allclose(
+            grid_import,
+            np.stack([reference["grid_import"] for reference in references], 1),
+        )
+        assert np.isclose(
+            steps[-1][3]["cumulative_reward"],
+            sum(step[1] for step in steps),
+        )
+        assert peak <= sum(reference["peak"] for reference in references)
+        energy = sum(
+            reference["rewards"].sum() - 49.0 * reference["peak"]
+            for reference in references
+        )
+
+        assert np.isclose(sum(step[1] for step in steps), energy + 49.0 * peak)
+
+    def test_observation_peak(self, context: Dict[str, Any]) -> None:
+        env = context["env"]
+        env.reset(start_time=context["start_time"])
+        observation, _, _, info = env.step(context["actions"][0])
+
+        assert np.allclose(observation[:, 6], info["combined_grid_import"])
+        assert np.allclose(observation[:, 5], info["grid_import"])
+
+    def test_per_site_capacity(self, context: Dict[str, Any]) -> None:
+        env = MultiSiteRyeEnv(
+            context["sites"], timedelta(days=2), battery_capacity=[100, 200, 300]
+        )
+        env.reset(start_time=context["start_time"])
+
+        for _ in range(5):
+            observation = env.step(np.full((3, 2), 400.0))[0]
+
+        assert np.allclose(observation[:, 3], [100, 200, 300])
+
+    def test_capacity_from_parameters(self, context: Dict[str, Any]) -> None:
+        env = MultiSiteRyeEnv(
+            context["sites"],
+            timedelta(days=2),
+            parameters=MicrogridParameters(battery_capacity=1000.0),
+        )
+
+        assert np.allclose(env._parameters.battery_capacity, 1000.0)
+        assert np.allclose(env.observation_space.high[:, 3], 1000.0)
+        assert np.allclose(env.observation_space.high[:, 4], 1670.0)
+
+        env = MultiSiteRyeEnv(
+            context["sites"],
+            timedelta(days=2),
+            parameters=MicrogridParameters(battery_capacity=1000.0),
+            battery_capacity=[100, 200, 300],
+        )
+
+        assert np.allclose(env.observation_space.high[:, 3], [100, 200, 300])
+
+    def test_per_site_parameters(self, context: Dict[str, Any]) -> None:
+        parameters = MicrogridParameters(
+            charge_battery_max=np.array([400.0, 200.0, 100.0]),
+            charge_loss_battery=np.array([1.0, 0.5, 0.85]),
+        )
+        env = MultiSiteRyeEnv(
+            context["sites"], timedelta(days=2), parameters=parameters
+        )
+
+        assert env.action_space.shape == (3, 2)
+        assert np.array_equal(env.action_space.high[:, 0], [400, 200, 100])
+        assert np.array_equal(env.action_space.low[:, 1], [-100] * 3)
+
+        env.reset(start_time=context["start_time"])
+        observation, _, _, info = env.step(np.full((3, 2), [400.0, 0.0]))
+
+        assert np.allclose(info["action"][:, 0], [400, 200, 100])
+        assert np.allclose(observation[:, 3], [400, 100, 85])
+
+    def test_common_time_grid(
+        self, synthetic_frame: Callable[..., pd.DataFrame]
+    ) -> None:
+        env = MultiSiteRyeEnv(
+            [
+                synthetic_frame(24 * 10, random_seed=0),
+                synthetic_frame(24 * 10, random_seed=1, start="2020-1-2"),
+            ],
+            timedelta(days=2),
+        )
+
+        assert env._start_time_data == datetime(2020, 1, 2)
+        assert env._exogenous.shape == (2, 24 * 9, 4)
@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.normalization import Normalizer
+from rldiff.preprocessing import preprocess_data
+
+
+@pytest.fixture
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    data = preprocess_data(
+        synthetic_frame(24 * 10, price_range=(-0.5, 2.0), random_seed=rng)
+    )
+    actions = rng.uniform([-400, -100], [400, 55], (48, 2))
+
+    return {"data": data, "actions": actions, "start_time": datetime(2020, 1, 3)}
+
+
+def run_episode(env: RyeEnv, context: Dict[str, Any]) -> Dict[str, Any]:
+    env.reset(start_time=context["start_time"])
+    steps = [env.step(action) for action in context["actions"]]
+
+    return {
+        "observations": np.stack([step[0] for step in steps]),
+        "rewards": np.array([step[1] for step in steps]),
+        "infos": [step[3] for step in steps],
+    }
+
+
+class TestNormalization:
+    """
+    Class testing observation and reward normalization in RyeEnv.
+    """
+
+    def test_scales_are_powers_of_two(self, context: Dict[str, Any]) -> None:
+        normalizer = Normalizer.from_data(context["data"])
+
+        assert np.all(np.log2(normalizer.observation_scale) % 1 == 0)
+        assert np.log2(normalizer.reward_scale) % 1 == 0
+        assert np.all(normalizer.observation_scale >= normalizer.bound)
+
+    def test_observation_space_is_finite(self, context: Dict[str, Any]) -> None:
+        normalizer = Normalizer.from_data(context["data"])
+        env = RyeEnv(context["data"], timedelta(days=2), normalizer=normalizer)
+
+        assert np.isfinite(env.observation_space.high).all()
+        assert np.abs(env.observation_space.high).max() <= 1
+
+    @pytest.mark.parametrize("dtype", [np.float32, np.float64])
+    def test_exactly_invertible(self, context: Dict[str, Any], dtype: Any) -> None:
+        normalizer = Normalizer.from_data(context["data"])
+        raw = run_episode(
+            RyeEnv(context["data"], timedelta(days=2), dtype=dtype), context
+        )
+        scaled = run_episode(
+            RyeEnv(
+                context["data"],
+                timedelta(days=2),
+                dtype=dtype,
+                normalizer=normalizer,
+            ),
+            context,
+        )
+
+        assert scaled["observations"].dtype == dtype
+        assert np.array_equal(
+            normalizer.denormalize_observation(scaled["observations"]),
+            raw["observations"],
+        )
+        assert np.array_equal(
+            [normalizer.denormalize_reward(reward) for reward in scaled["rewards"]],
+            raw["rewards"],
+        )
+        assert (np.abs(scaled["observations"]) <= 1).all()
+
+    def test_info_is_raw(self, context: Dict[str, Any]) -> None:
+        normalizer = Normalizer.from_data(context["data"])
+        env = RyeEnv(context["data"], timedelta(days=2), normalizer=normalizer)
+        env.reset(start_time=context["start_time"])
+        _, reward, _, info = env.step(context["actions"][0])
+
+        assert info.info["reward"] == normalizer.denormalize_reward(reward)
+
+    def test_output_buffer(self, context: Dict[str, Any]) -> None:
+        normalizer = Normalizer.from_data(context["data"])
+        env = RyeEnv(context["data"], timedelta(days=2), normalizer=normalizer)
+        env.reset(start_time=context["start_time"])
+        out = np.empty(8)
+
+        observation = env.step(context["actions"][0], out=out)[0]
+
+        assert observation is out
+        assert np.array_equal(
+            normalizer.denormalize_observation(out), env.get_state_vector()
+        )
+
+    def test_running_update(self) -> None:
+        normalizer = Normalizer(np.ones(8), 1.0, update=True)
+        normalizer.observe(np.full(8, 5.0), -20.0)
+
+        assert np.all(normalizer.observation_scale == 8)
+        assert normalizer.reward_scale == 32
+        assert normalizer.version == 1
+        assert normalizer.denormalize_reward(1.0, version=0) == 1.0
+
+    def test_updates_stay_invertible(self, context: Dict[str, Any]) -> None:
+        # Bounds far below the data force the scales to grow during the run
+        normalizer = Normalizer(np.ones(8), 1.0, update=True)
+        raw = run_episode(RyeEnv(context["data"], timedelta(days=2)), context)
+        env = RyeEnv(context["data"], timedelta(days=2), normalizer=normalizer)
+        scaled = run_episode(env, context)
+
+        versions = [info.info["normalizer_version"] for info in scaled["infos"]]
+        assert versions[-1] == normalizer.version > versions[0]
+
+        observations = [
+            normalizer.denormalize_observation(observation, version=version)
+            for observation, version in zip(scaled["observations"], versions)
+        ]
+        rewards = [
+            normalizer.denormalize_reward(reward, version=version)
+            for reward, version in zip(scaled["rewards"], versions)
+        ]
+
+        assert np.array_equal(observations, raw["observations"])
+        assert np.array_equal(rewards, raw["rewards"])
+
+        # The observation space follows the grown scales
+        assert np.array_equal(
+            env.observation_space.high[5],
+            np.float64(normalizer.bound[5] / normalizer.observation_scale[5]),
+        )
+        assert env.observation_space.contains(scaled["observations"][-1])
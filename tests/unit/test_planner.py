@@ -0,0 +1,195 @@
+from typing import Any, Callable, Dict
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.dynamics import MicrogridParameters, rollout
+from rldiff.planner import DiffusionPlanner, sequence_windows
+from rldiff.preprocessing import preprocess_data
+
+
+@pytest.fixture(scope="module")
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    data = preprocess_data(synthetic_frame(24 * 10, random_seed=rng))
+    env = RyeEnv(data, timedelta(days=4))
+
+    # Behavior data from random episodes
+    observations, actions = [], []
+    for day in range(1, 6):
+        observation = env.reset(start_time=datetime(2020, 1, day))
+        episode_actions = rng.uniform([-400, -100], [400, 55], (96, 2))
+        episode_observations = [observation]
+
+        for action in episode_actions[:-1]:
+            episode_observations.append(env.step(action)[0])
+
+        observations.append(np.stack(episode_observations))
+        actions.append(episode_actions)
+
+    windows = [
+        sequence_windows(episode_observations, episode_actions, 12)
+        for episode_observations, episode_actions in zip(observations, actions)
+    ]
+    states, exogenous, sequences = (
+        np.concatenate([window[index] for window in windows]) for index in range(3)
+    )
+
+    planner = DiffusionPlanner(horizon=12, hidden_size=64, random_seed=0)
+    losses = planner.fit(states, exogenous, sequences, epochs=300, batch_size=64)
+
+    return {
+        "data": data,
+        "env": env,
+        "planner": planner,
+        "losses": losses,
+        "observations": observations[0],
+        "states": states,
+        "exogenous": exogenous,
+        "sequences": sequences,
+    }
+
+
+class TestPlanner:
+    """
+    Class testing the diffusion action-sequence planner.
+    """
+
+    def test_sequence_windows(self, context: Dict[str, Any]) -> None:
+        observations = context["observations"]
+
+        assert context["states"].shape[1:] == (8,)
+        assert context["exogenous"].shape[1:] == (12, 4)
+        assert context["sequences"].shape[1:] == (12, 2)
+        assert np.array_equal(context["exogenous"][0, 0], observations[1, [0, 1, 2, 7]])
+
+    def test_training_loss(self, context: Dict[str, Any]) -> None:
+        assert np.mean(context["losses"][-50:]) < np.mean(context["losses"][:50])
+
+    def test_plan(self, context: Dict[str, Any]) -> None:
+        planner = context["planner"]
+        sequences, report = planner.plan(
+            context["states"][:3], context["exogenous"][:3], samples=16, steps=5
+        )
+
+        assert sequences.shape == (3, 12, 2)
+        assert (sequences >= [-400, -100]).all() and (sequences <= [400, 55]).all()
+        assert report.decisions == 3 and report.best_cost.shape == (3,)
+        assert report.total_seconds >= report.denoise_seconds
+
+    def test_selects_cheapest(self, context: Dict[str, Any]) -> None:
+        planner = context["planner"]
+        states, exogenous = context["states"][:1], context["exogenous"][:1]
+
+        # The single candidate of the first call is the first of the second call
+        single, single_report = planner.plan(states, exogenous, 1, 10, random_seed=0)
+        best, best_report = planner.plan(states, exogenous, 256, 10, random_seed=0)
+
+        energy, peak, _, _ = rollout(
+            planner.parameters,
+            states[:, 3],
+            states[:, 4],
+            states[:, 6],
+            best,
+            exogenous,
+        )
+
+        assert np.allclose(energy + 49.0 * (peak - states[:, 6]), best_report.best_cost)
+        assert best_report.best_cost[0] <= single_report.best_cost[0]
+
+    def test_scoring_matches_env(self, context: Dict[str, Any]) -> None:
+        env = RyeEnv(context["data"], timedelta(hours=12))
+        state = env.reset(start_time=datetime(2020, 1, 2))
+        sequence = context["sequences"][0]
+
+        rewards = [env.step(action)[1] for action in sequence]
+        energy, peak, _, _ = rollout(
+            MicrogridParameters.from_env(env),
+            state[3],
+            state[4],
+            state[6],
+            sequence,
+            context["data"].values[25:37],
+        )
+
+        assert np.isclose(sum(rewards), energy + 49.0 * peak)
+
+    def test_act_on_env(self, context: Dict[str, Any]) -> None:
+        planner = context["planner"]
+        env = RyeEnv(context["data"], timedelta(days=1))
+        env.reset(start_time=datetime(2020, 1, 2))
+        calls = len(planner.reports)
+
+        done = False
+        while not done:
+            action = planner.act_on_env(env, samples=8, steps=3)
+            _, _, done, _ = env.step(action)
+
+        assert len(planner.reports) - calls == 24
+        assert planner.latency()["p95"] > 0
+
+    def test_episode_end_within_horizon(self, context: Dict[str, Any]) -> None:
+        planner = context["planner"]
+        states, exogenous = context["states"][:2], context["exogenous"][:2]
+
+        best, report = planner.plan(
+            states, exogenous, 16, 5, random_seed=0, remaining=np.array([3, 20])
+        )
+
+        # Only the hours before the end are charged, with the whole peak
+        energy, peak, _, _ = rollout(
+            planner.parameters,
+            states[:1, 3],
+            states[:1, 4],
+            states[:1, 6],
+            best[:1, :3],
+            exogenous[:1, :3],
+        )
+        assert np.isclose(energy[0] + 49.0 * peak[0], report.best_cost[0])
+
+        energy, peak, _, _ = rollout(
+            planner.parameters,
+            states[1:, 3],
+            states[1:, 4],
+            states[1:, 6],
+            best[1:],
+            exogenous[1:],
+        )
+        assert np.isclose(
+            energy[0] + 49.0 * (peak[0] - states[1, 6]), report.best_cost[1]
+        )
+
+    def test_act_on_env_scores_with_env(
+        self, context: Dict[str, Any], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        planner = context["planner"]
+        env = RyeEnv(
+            context["data"],
+            timedelta(days=1),
+            grid_tarrif=1.0,
+            peak_grid_tarrif=10.0,
+            # Scenarios longer than the episode
+            scenarios=context["data"].values[None, :48],
+        )
+        env.reset(start_time=datetime(2020, 1, 2))
+
+        calls = []
+        plan = planner.plan
+
+        def recording_plan(*args: Any, **kwargs: Any) -> Any:
+            calls.append(kwargs)
+            return plan(*args, **kwargs)
+
+        monkeypatch.setattr(planner, "plan", recording_plan)
+
+        for _ in range(20):
+            env.step(planner.act_on_env(env, samples=4, steps=2))
+        planner.act_on_env(env, samples=4, steps=2)
+
+        assert calls[0]["parameters"] == MicrogridParameters.from_env(env)
+        assert calls[0]["parameters"].peak_grid_tarrif == 10.0
+        assert calls[0]["remaining"][0] == 24
+        assert calls[-1]["remaining"][0] == 4
@@ -0,0 +1,66 @@
+from typing import Any, Callable, Dict
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.agent import RandomActionAgent
+
+
+@pytest.fixture
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    data = synthetic_frame(24 * 60)
+
+    return {
+        "float64_env": RyeEnv(data, timedelta(days=30)),
+        "float32_env": RyeEnv(data, timedelta(days=30), dtype=np.float32),
+    }
+
+
+def run_episode(env: RyeEnv, actions: np.ndarray) -> np.ndarray:
+    env.reset(start_time=datetime(2020, 1, 10))
+    rewards = [env.step(action)[1] for action in actions]
+
+    return np.array(rewards)
+
+
+class TestPrecision:
+    """
+    Class testing float32 environments against the float64 reference.
+    """
+
+    def test_spaces(self, context: Dict[str, Any]) -> None:
+        assert context["float32_env"].action_space.dtype == np.float32
+        assert context["float32_env"].observation_space.dtype == np.float32
+
+    def test_exogenous_arrays(self, context: Dict[str, Any]) -> None:
+        assert context["float32_env"]._data.values.dtype == np.float32
+        assert (
+            context["float32_env"]._data.values.nbytes * 2
+            == context["float64_env"]._data.values.nbytes
+        )
+
+    def test_observations(self, context: Dict[str, Any]) -> None:
+        env = context["float32_env"]
+        observation = env.reset(start_time=datetime(2020, 1, 10))
+
+        assert observation.dtype == np.float32
+        assert env.step(np.zeros(2))[0].dtype == np.float32
+        assert env.get_state_vector().dtype == np.float32
+
+    def test_agent_actions(self, context: Dict[str, Any]) -> None:
+        agent = RandomActionAgent(context["float32_env"].action_space)
+
+        assert agent.act(np.zeros((3, 8), dtype=np.float32)).dtype == np.float32
+
+    def test_cost_deviation(self, context: Dict[str, Any]) -> None:
+        agent = RandomActionAgent(context["float64_env"].action_space, random_seed=0)
+        actions = agent.sample_episodes(24 * 30)[0]
+
+        reference = run_episode(context["float64_env"], actions)
+        reduced = run_episode(context["float32_env"], actions)
+
+        assert np.allclose(reduced, reference, rtol=1e-4, atol=1e-3)
+        assert abs(reduced.sum() - reference.sum()) <= 1e-5 * abs(reference.sum())
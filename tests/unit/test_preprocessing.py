@@ -0,0 +1,118 @@
+from typing import Dict, Any
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.exception import DataValidationException
+from rldiff.preprocessing import (
+    PreprocessedData,
+    load_preprocessed,
+    preprocess_data,
+    preprocessed_path,
+)
+
+
+@pytest.fixture
+def context() -> Dict[str, Any]:
+    time = pd.date_range("2020-10-24T00:00", periods=48, freq="h")
+
+    data = pd.DataFrame(
+        data={
+            "time": time,
+            "consumption": np.arange(48, dtype=np.float64),
+            "wind_production": np.ones(48),
+            "photovoltaic_production": np.ones(48),
+            "spot_market_price": np.full(48, 0.5),
+        }
+    )
+
+    # Drop hours 10-12 and repeat hour 26 as on a DST transition
+    gapped = data.drop(index=[10, 11, 12])
+    repeated = data.iloc[[26]].assign(consumption=100.0)
+    gapped = pd.concat([gapped, repeated]).reset_index(drop=True)
+
+    return {"data": data, "gapped": gapped}
+
+
+class TestPreprocessing:
+    """
+    Class testing dense-grid preprocessing of Rye data.
+    """
+
+    def test_dense_grid(self, context: Dict[str, Any]) -> None:
+        preprocessed = preprocess_data(context["gapped"])
+
+        assert len(preprocessed.values) == 48
+        assert preprocessed.filled[10:13].all()
+        assert preprocessed.filled.sum() == 3
+
+    def test_linear_interpolation(self, context: Dict[str, Any]) -> None:
+        consumption = preprocess_data(context["gapped"]).column("consumption")
+
+        assert np.allclose(consumption[10:13], [10, 11, 12])
+
+    def test_ffill_interpolation(self, context: Dict[str, Any]) -> None:
+        preprocessed = preprocess_data(context["gapped"], interpolation="ffill")
+
+        assert np.allclose(preprocessed.column("consumption")[10:13], 9)
+
+    def test_duplicates(self, context: Dict[str, Any]) -> None:
+        consumption = preprocess_data(context["gapped"]).column("consumption")
+        last = preprocess_data(context["gapped"], duplicates="last")
+
+        assert consumption[26] == 63
+        assert last.column("consumption")[26] == 100
+
+    def test_max_gap(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(DataValidationException):
+            preprocess_data(context["gapped"], max_gap=2)
+
+    def test_missing_column(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(DataValidationException):
+            preprocess_data(context["data"].drop(columns="consumption"))
+
+    def test_dtype(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(DataValidationException):
+            preprocess_data(context["data"].assign(consumption="high"))
+
+    def test_range(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(DataValidationException):
+            preprocess_data(context["data"].assign(wind_production=-1.0))
+
+    def test_bounds(self, context: Dict[str, Any]) -> None:
+        preprocessed = preprocess_data(context["data"])
+
+        assert np.allclose(preprocessed.minimum, [0, 1, 1, 0.5])
+        assert np.allclose(preprocessed.maximum, [47, 1, 1, 0.5])
+
+    def test_timezone(self, context: Dict[str, Any]) -> None:
+        data = context["data"].assign(
+            time=context["data"].time.dt.tz_localize("UTC").dt.tz_convert("Europe/Oslo")
+        )
+
+        assert preprocess_data(data).start_time == datetime(2020, 10, 24)
+        assert len(preprocess_data(data).values) == 48
+
+    def test_stored_alongside(self, context: Dict[str, Any], tmp_path) -> None:
+        path = str(tmp_path / "train.csv")
+        context["gapped"].to_csv(path, index=False)
+
+        built = load_preprocessed(path)
+        loaded = PreprocessedData.load(preprocessed_path(path))
+
+        assert loaded.start_time == built.start_time
+        assert np.array_equal(loaded.values, built.values)
+        assert np.array_equal(load_preprocessed(path).values, built.values)
+
+    def test_env_steps_over_gap(self, context: Dict[str, Any]) -> None:
+        env = RyeEnv(preprocess_data(context["gapped"]), timedelta(hours=24))
+        env.reset(start_time=datetime(2020, 10, 24))
+
+        done = False
+        while not done:
+            _, _, done, _ = env.step(np.zeros(2))
+
+        assert len(env.get_possible_start_times()) == 24
@@ -0,0 +1,150 @@
+from typing import Any, Callable, Dict
+import os
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+import rldiff.replay
+from rldiff.env import ENV_VERSION, RyeEnv
+from rldiff.dynamics import MicrogridParameters
+from rldiff.preprocessing import preprocess_data
+from rldiff.replay import ActionLog, EpisodeRecorder, replay
+
+
+@pytest.fixture
+def context(synthetic_frame: Callable[..., pd.DataFrame]) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    data = preprocess_data(
+        synthetic_frame(24 * 20, price_range=(-0.5, 2.0), random_seed=rng)
+    )
+
+    return {"data": data, "episode_length": timedelta(days=2), "rng": rng}
+
+
+def record(env: RyeEnv, path: str, rng: np.random.Generator, episodes: int) -> None:
+    steps = int(env._episode_length / timedelta(hours=1))
+
+    with EpisodeRecorder(env, path) as recorder:
+        for episode in range(episodes):
+            recorder.reset(
+                start_time=datetime(2020, 1, 1 + episode % 15, episode % 24),
+                battery_storage=rng.uniform(0, 500),
+                hydrogen_storage=rng.uniform(0, 1670),
+            )
+            for action in rng.uniform([-450, -120], [450, 70], (steps, 2)):
+                recorder.step(action)
+
+
+class TestReplay:
+    """
+    Class testing action logs and their replay.
+    """
+
+    @pytest.mark.parametrize("dtype", [np.float64, np.float32])
+    def test_replay_matches_env(
+        self, context: Dict[str, Any], tmp_path: Any, dtype: Any
+    ) -> None:
+        env = RyeEnv(
+            data=context["data"], episode_length=context["episode_length"], dtype=dtype
+        )
+        path = str(tmp_path / "actions.log")
+        record(env, path, context["rng"], episodes=20)
+
+        log = ActionLog(path)
+        assert len(log) == 20
+        assert log.start_time(1) == datetime(2020, 1, 2, 1)
+        assert log.records["actions"].dtype == np.dtype(dtype)
+
+        report = replay(log, context["data"], batch_size=8)
+
+        assert len(report.divergent) == 0
+        assert not report.version_changed
+        np.testing.assert_allclose(
+            report.replayed_cost, report.recorded_cost, rtol=report.tolerance
+        )
+
+    def test_divergence_is_reported(
+        self, context: Dict[str, Any], tmp_path: Any
+    ) -> None:
+        env = RyeEnv(data=context["data"], episode_length=context["episode_length"])
+        path = str(tmp_path / "actions.log")
+        record(env, path, context["rng"], episodes=5)
+
+        log = ActionLog(path)
+        changed = MicrogridParameters(
+            **{**log.header["parameters"], "charge_loss_battery": 0.5}
+        )
+
+        assert len(replay(log, context["data"], parameters=changed).divergent) == 5
+
+    def test_append_and_truncated_record(
+        self, context: Dict[str, Any], tmp_path: Any
+    ) -> None:
+        env = RyeEnv(data=context["data"], episode_length=context["episode_length"])
+        path = str(tmp_path / "actions.log")
+
+        record(env, path, context["rng"], episodes=2)
+        with open(path, "ab") as file:
+            file.write(b"partial")
+        assert len(ActionLog(path)) == 2
+
+        record(env, path, context["rng"], episodes=3)
+        log = ActionLog(path)
+
+        assert len(log) == 5
+        assert len(replay(log, context["data"]).divergent) == 0
+
+        # Record size: header fields plus 2 float64 actions per step
+        assert log.records.itemsize == 5 * 8 + 48 * 2 * 8
+
+    def test_unfinished_episodes_are_not_recorded(
+        self, context: Dict[str, Any], tmp_path: Any
+    ) -> None:
+        env = RyeEnv(data=context["data"], episode_length=context["episode_length"])
+        path = str(tmp_path / "actions.log")
+
+        with EpisodeRecorder(env, path) as recorder:
+            recorder.reset(start_time=datetime(2020, 1, 3))
+            recorder.step(np.zeros(2))
+
+        assert len(ActionLog(path)) == 0
+        assert os.path.getsize(path) % 8 == 0
+
+    def test_incompatible_env(self, context: Dict[str, Any], tmp_path: Any) -> None:
+        path = str(tmp_path / "actions.log")
+        record(
+            RyeEnv(data=context["data"], episode_length=context["episode_length"]),
+            path,
+            context["rng"],
+            episodes=1,
+        )
+
+        with pytest.raises(ValueError):
+            EpisodeRecorder(
+                RyeEnv(data=context["data"], episode_length=timedelta(days=1)), path
+            )
+
+        other = preprocess_data(context["data"].frame * 2)
+        with pytest.raises(ValueError):
+            replay(ActionLog(path), other)
+
+    def test_version_in_report(
+        self,
+        context: Dict[str, Any],
+        tmp_path: Any,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        env = RyeEnv(data=context["data"], episode_length=context["episode_length"])
+        path = str(tmp_path / "actions.log")
+
+        monkeypatch.setattr(rldiff.replay, "ENV_VERSION", "0")
+        record(env, path, context["rng"], episodes=1)
+        monkeypatch.undo()
+
+        report = replay(ActionLog(path), context["data"])
+
+        assert report.recorded_version == "0"
+        assert report.replayed_version == ENV_VERSION
+        assert report.version_changed
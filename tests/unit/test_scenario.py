@@ -0,0 +1,134 @@
+from typing import Dict, Any
+import numpy as np
+import pytest
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+from rldiff.env import RyeEnv
+from rldiff.preprocessing import preprocess_data
+from rldiff.scenario import ScenarioCache, ScenarioGenerator
+
+
+@pytest.fixture(scope="module")
+def context() -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    hours = np.arange(24 * 60)
+
+    data = preprocess_data(
+        pd.DataFrame(
+            data={
+                "consumption": 200 + 50 * np.sin(2 * np.pi * hours / 24),
+                "wind_production": rng.uniform(50, 150, len(hours)),
+                "photovoltaic_production": np.clip(
+                    80 * np.sin(2 * np.pi * (hours % 24 - 6) / 24), 0, None
+                ),
+                "spot_market_price": rng.uniform(0.5, 1.5, len(hours)),
+            },
+            index=pd.date_range("2020-1-1", periods=len(hours), freq="h"),
+        )
+    )
+
+    generator = ScenarioGenerator(49, components=8, hidden_size=64, random_seed=0)
+    losses = generator.fit(data, epochs=500, batch_size=64, stride=6)
+
+    return {"data": data, "generator": generator, "losses": losses}
+
+
+class TestScenario:
+    """
+    Class testing the diffusion scenario generator and scenario cache.
+    """
+
+    def test_training_loss(self, context: Dict[str, Any]) -> None:
+        assert np.mean(context["losses"][-50:]) < np.mean(context["losses"][:50])
+
+    def test_sample(self, context: Dict[str, Any]) -> None:
+        scenarios = context["generator"].sample(300, steps=10, batch_size=128)
+
+        assert scenarios.shape == (300, 49, 4)
+        assert scenarios.dtype == np.float32
+        assert (scenarios >= context["data"].minimum.astype(np.float32)).all()
+        assert (scenarios <= context["data"].maximum.astype(np.float32)).all()
+
+    def test_sample_statistics(self, context: Dict[str, Any]) -> None:
+        scenarios = context["generator"].sample(500, steps=20, random_seed=0)
+
+        assert np.allclose(
+            scenarios.mean(axis=(0, 1)), context["data"].values.mean(axis=0), rtol=0.25
+        )
+
+    def test_seeded(self, context: Dict[str, Any]) -> None:
+        first = context["generator"].sample(5, steps=5, random_seed=1)
+        second = context["generator"].sample(5, steps=5, random_seed=1)
+
+        assert np.array_equal(first, second)
+
+    def test_save_load(self, context: Dict[str, Any], tmp_path) -> None:
+        path = str(tmp_path / "generator.npz")
+        context["generator"].save(path)
+        loaded = ScenarioGenerator.load(path)
+
+        assert loaded.fingerprint == context["generator"].fingerprint
+        assert np.array_equal(
+            loaded.sample(3, steps=5, random_seed=0),
+            context["generator"].sample(3, steps=5, random_seed=0),
+        )
+
+    def test_cache(self, context: Dict[str, Any], tmp_path) -> None:
+        cache = ScenarioCache(str(tmp_path))
+        scenarios = cache.get(context["generator"], 20, random_seed=0, steps=5)
+
+        assert isinstance(scenarios, np.memmap)
+        assert np.array_equal(
+            scenarios, context["generator"].sample(20, steps=5, random_seed=0)
+        )
+        assert len(list(tmp_path.iterdir())) == 1
+
+        cache.get(context["generator"], 20, random_seed=0, steps=5)
+        cache.get(context["generator"], 20, random_seed=1, steps=5)
+
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_env_draws_scenarios(self, context: Dict[str, Any], tmp_path) -> None:
+        scenarios = ScenarioCache(str(tmp_path)).get(context["generator"], 4, steps=5)
+        env = RyeEnv(context["data"], timedelta(days=2), scenarios=scenarios)
+
+        observation = env.reset(start_time=datetime(2020, 1, 5), scenario=2)
+
+        assert np.isclose(observation[0], scenarios[2, 0, 0])
+
+        done = False
+        while not done:
+            observation, _, done, info = env.step(np.zeros(2))
+
+        assert np.isclose(info.info["state"].consumption, scenarios[2, 48, 0])
+
+    @pytest.mark.parametrize("dtype", [np.float32, np.float64])
+    def test_env_scenario_dtype(
+        self, context: Dict[str, Any], tmp_path, dtype: Any
+    ) -> None:
+        scenarios = ScenarioCache(str(tmp_path)).get(context["generator"], 2, steps=5)
+        env = RyeEnv(
+            context["data"],
+            timedelta(days=2),
+            dtype=dtype,
+            scenarios=scenarios.astype(np.float64),
+        )
+        env.reset(start_time=datetime(2020, 1, 5))
+
+        assert env._episode_exogenous.dtype == dtype
+        assert env.step(np.zeros(2))[0].dtype == dtype
+
+        # Matching precision shares memory with the memory-mapped cache
+        env = RyeEnv(
+            context["data"],
+            timedelta(days=2),
+            dtype=scenarios.dtype,
+            scenarios=scenarios,
+        )
+        assert np.shares_memory(env._scenarios, scenarios)
+
+    def test_env_rejects_short_scenarios(self, context: Dict[str, Any]) -> None:
+        with pytest.raises(ValueError):
+            RyeEnv(context["data"], timedelta(days=3), scenarios=np.zeros((2, 49, 4)))